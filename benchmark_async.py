@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from test_mesures_graph import instance_seeds, solve_instance
+
+
+# =====================================================================
+# Benchmark en arrière-plan (progression + annulation)
+# =====================================================================
+
+class BenchmarkJob:
+    """
+    Exécute les instances de run_instances() dans un thread de fond, sans
+    bloquer l'appelant (ex. le script Streamlit) :
+
+      - job.start()              : lance le calcul et rend la main aussitôt
+      - job.finished_results()   : [(indice, résultat)] des instances terminées
+      - job.completed / job.total, job.done, job.error
+      - job.cancel()             : les instances pas encore commencées sont abandonnées
+
+    Chaque résultat est celui de solve_instance() ; les graines sont celles
+    de instance_seeds(), donc identiques à un run_instances() synchrone.
+    """
+
+    def __init__(self, nb_tests, n_students, n_schools, seed=None, workers=None,
+                 model=None, model_params=None, cache_dir=None):
+        self.tasks = [(s, n_students, n_schools, model, model_params, cache_dir)
+                      for s in instance_seeds(nb_tests, seed)]
+        self.workers = workers
+        self.results = [None] * len(self.tasks)
+        self.completed = 0
+        self.error = None
+
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def total(self):
+        return len(self.tasks)
+
+    @property
+    def done(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """Attend la fin du calcul (ou de l'annulation) ; retourne done."""
+        self._thread.join(timeout)
+        return self.done
+
+    def finished_results(self):
+        with self._lock:
+            return [(i, r) for i, r in enumerate(self.results) if r is not None]
+
+    def _run(self):
+        # un seul thread de calcul suffit sans workers : le GIL est relâché
+        # pendant les pauses de l'animation
+        if self.workers is not None and self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+
+        try:
+            futures = {executor.submit(solve_instance, task): i for i, task in enumerate(self.tasks)}
+            for future in as_completed(futures):
+                if self._cancel.is_set():
+                    break
+                result = future.result()
+                with self._lock:
+                    self.results[futures[future]] = result
+                    self.completed += 1
+        except Exception as exc:
+            self.error = exc
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+import csv
+import io
+import json
+import os
+
+from measures import json_measure
+
+
+# =====================================================================
+# Lecture en flux des fichiers benchmark (plusieurs instances par fichier)
+# =====================================================================
+#
+# Format (écrit par BenchmarkWriter, plus bas) :
+#   Type,Nom,Préférences
+#   Etudiant,...   \
+#   Ecole,...       > une instance
+#   <ligne vide>   /
+#   Etudiant,...
+#
+# Une instance se termine sur une ligne vide ou lorsqu'une ligne "Etudiant"
+# suit une ligne "Ecole".
+
+def _parse_line(raw):
+    """Décode une ligne brute du fichier ; None pour une ligne vide."""
+    text = raw.decode("utf-8").rstrip("\r\n")
+    if not text.strip():
+        return None
+    row = next(csv.reader([text]))
+    if len(row) < 3:
+        return None
+    entity_type, name, preferences = row[0].strip(), row[1].strip(), row[2]
+    return entity_type, name, [p.strip() for p in preferences.split(" - ")]
+
+
+def iter_instances_with_offsets(filename):
+    """
+    Parcourt le fichier une ligne à la fois et produit
+    (offset, (prefs_students, prefs_schools)) pour chaque instance,
+    offset étant la position en octets de sa première ligne.
+    Une seule instance est en mémoire à la fois.
+    """
+    with open(filename, "rb") as f:
+        offset = len(f.readline())  # sauter l'en-tête
+
+        start = None
+        prefs_students, prefs_schools = {}, {}
+
+        for raw in f:
+            line_offset = offset
+            offset += len(raw)
+            parsed = _parse_line(raw)
+
+            # fin d'instance : ligne vide, ou étudiant après des écoles
+            if parsed is None or (parsed[0] == "Etudiant" and prefs_schools):
+                if prefs_students and prefs_schools:
+                    yield start, (prefs_students, prefs_schools)
+                start = None
+                prefs_students, prefs_schools = {}, {}
+                if parsed is None:
+                    continue
+
+            entity_type, name, prefs = parsed
+            if start is None:
+                start = line_offset
+            if entity_type == "Etudiant":
+                prefs_students[name] = prefs
+            elif entity_type == "Ecole":
+                prefs_schools[name] = prefs
+
+        if prefs_students and prefs_schools:
+            yield start, (prefs_students, prefs_schools)
+
+
+def iter_benchmark_instances(filename):
+    """Générateur des instances (prefs_students, prefs_schools) d'un fichier benchmark."""
+    for _, instance in iter_instances_with_offsets(filename):
+        yield instance
+
+
+def build_benchmark_index(filename):
+    """Liste des offsets (en octets) du début de chaque instance."""
+    return [offset for offset, _ in iter_instances_with_offsets(filename)]
+
+
+def read_benchmark_instance(filename, offset):
+    """Lit uniquement l'instance qui commence à `offset` (cf. build_benchmark_index)."""
+    prefs_students, prefs_schools = {}, {}
+
+    with open(filename, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            parsed = _parse_line(raw)
+            if parsed is None or (parsed[0] == "Etudiant" and prefs_schools):
+                break
+
+            entity_type, name, prefs = parsed
+            if entity_type == "Etudiant":
+                prefs_students[name] = prefs
+            elif entity_type == "Ecole":
+                prefs_schools[name] = prefs
+
+    return prefs_students, prefs_schools
+
+
+# =====================================================================
+# Écriture groupée + index annexe
+# =====================================================================
+#
+# L'index est un fichier JSON Lines à côté du CSV (<fichier>.index.jsonl),
+# une ligne par instance :
+#   {"id", "offset", "n_students", "n_schools", "seed", "measures"}
+
+HEADER = ["Type", "Nom", "Préférences"]
+
+
+def index_filename(filename):
+    return f"{filename}.index.jsonl"
+
+
+class BenchmarkWriter:
+    """
+    Écrit les instances d'un benchmark avec un seul descripteur ouvert pendant
+    tout le balayage ; les lignes sont accumulées en mémoire puis écrites par
+    blocs d'au moins batch_bytes octets. Le format du CSV est celui décrit
+    en tête de module, lu par iter_benchmark_instances().
+
+    append=False remplace un fichier existant (et son index). Le writer
+    appartient au processus qui l'a ouvert : avec plusieurs workers, ce sont
+    eux qui calculent et le processus principal, seul collecteur, qui écrit.
+
+        with BenchmarkWriter("instances_bench_temp.csv") as writer:
+            writer.write_instance(students, schools, prefs_students, prefs_schools, seed, measures)
+    """
+
+    def __init__(self, filename, append=False, batch_bytes=1 << 20):
+        self.filename = filename
+        self.batch_bytes = batch_bytes
+        self.pid = os.getpid()
+
+        mode = "ab" if append else "wb"
+        self.file = open(filename, mode)
+        self.index = open(index_filename(filename), mode)
+        self.offset = self.file.seek(0, os.SEEK_END)
+
+        self.next_id = 0
+        if append and self.index.tell():
+            with open(index_filename(filename), "rb") as f:
+                self.next_id = sum(1 for line in f if line.strip())
+
+        self._rows = []
+        self._entries = []
+        self._buffered = 0
+        if self.offset == 0:
+            self._append_text(self._encode([HEADER]))
+
+    def _encode(self, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode("utf-8")
+
+    def _append_text(self, data):
+        self._rows.append(data)
+        self._buffered += len(data)
+        self.offset += len(data)
+
+    def write_instance(self, students, schools, prefs_students, prefs_schools, seed=None, measures=None):
+        """Ajoute une instance ; retourne son identifiant dans l'index."""
+        if os.getpid() != self.pid:
+            raise RuntimeError("BenchmarkWriter utilisé depuis un autre processus : "
+                               "renvoyer les résultats au processus collecteur.")
+
+        rows = [["Etudiant", s, " - ".join(prefs_students[s])] for s in students]
+        rows += [["Ecole", e, " - ".join(prefs_schools[e])] for e in schools]
+        rows.append([])  # ligne vide entre les instances
+
+        if measures is not None:
+            # NaN (moyenne sans agent apparié) -> null : l'index reste du JSON strict
+            measures = {name: json_measure(value) for name, value in measures.items()}
+
+        instance_id = self.next_id
+        self.next_id += 1
+        entry = {
+            "id": instance_id, "offset": self.offset,
+            "n_students": len(students), "n_schools": len(schools),
+            "seed": seed, "measures": measures,
+        }
+        self._append_text(self._encode(rows))
+        self._entries.append(json.dumps(entry, ensure_ascii=False, allow_nan=False).encode("utf-8") + b"\n")
+
+        if self._buffered >= self.batch_bytes:
+            self.flush()
+        return instance_id
+
+    def flush(self):
+        # le CSV d'abord : une entrée d'index ne pointe jamais vers des octets absents
+        self.file.write(b"".join(self._rows))
+        self.file.flush()
+        self.index.write(b"".join(self._entries))
+        self.index.flush()
+        self._rows, self._entries, self._buffered = [], [], 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_benchmark_index(filename):
+    """
+    Entrées de l'index annexe (dictionnaires, dans l'ordre des instances).
+    Sans index, le fichier est parcouru une fois (offsets seulement).
+    """
+    try:
+        with open(index_filename(filename), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return [{"id": i, "offset": offset} for i, offset in enumerate(build_benchmark_index(filename))]
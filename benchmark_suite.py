@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+from binary_instance import to_prefs_dicts
+from gale_shapley import gale_shapley, index_instance
+from gale_shapley_numpy import gale_shapley_batch
+from generate_preference import generate_preferences_ids, save_to_csv
+from mariage_stable_mesure import compute_all_measures, mariage_stable, read_instance
+from measures import compute_measures
+from sparse_instance import compute_measures_sparse, gale_shapley_sparse, index_sparse_instance
+from tracing import Tracer
+
+
+# =====================================================================
+# 1) Moteurs comparés (sélection par nom)
+# =====================================================================
+#
+# Chaque moteur a trois étapes chronométrées séparément :
+#   prepare(bench)         -> état (encodage de l'instance)
+#   solve(état, tracer)    -> matching (tracer peut être ignoré)
+#   measures(état, match)  -> dictionnaire de mesures, ou measures=None
+
+Engine = namedtuple("Engine", "prepare solve measures")
+
+
+class BenchInstance:
+    """Instance générée : matrices d'identifiants + dictionnaires de noms construits à la demande."""
+
+    def __init__(self, students, schools, matrix_students, matrix_schools):
+        self.students = list(students)
+        self.schools = list(schools)
+        self.matrix_students = matrix_students
+        self.matrix_schools = matrix_schools
+        self._dicts = None
+
+    @property
+    def prefs(self):
+        if self._dicts is None:
+            self._dicts = to_prefs_dicts(self.students, self.schools, self.matrix_students, self.matrix_schools)
+        return self._dicts
+
+
+ENGINES = {
+    "legacy": Engine(
+        prepare=lambda bench: bench.prefs,
+        solve=lambda prefs, tracer: mariage_stable(*prefs, tracer=tracer),
+        measures=lambda prefs, engaged: compute_all_measures(*prefs, engaged),
+    ),
+    "fast": Engine(
+        prepare=lambda bench: index_instance(*bench.prefs),
+        solve=lambda instance, tracer: gale_shapley(instance, tracer=tracer),
+        measures=compute_measures,
+    ),
+    "fast-schools": Engine(
+        prepare=lambda bench: index_instance(*bench.prefs),
+        solve=lambda instance, tracer: gale_shapley(instance, "schools", tracer),
+        measures=compute_measures,
+    ),
+    "numpy": Engine(
+        prepare=lambda bench: (np.asarray(bench.matrix_students)[None], np.asarray(bench.matrix_schools)[None]),
+        solve=lambda tensors, tracer: gale_shapley_batch(*tensors)[0],
+        measures=None,
+    ),
+    "sparse": Engine(
+        prepare=lambda bench: index_sparse_instance(*bench.prefs),
+        solve=lambda instance, tracer: gale_shapley_sparse(instance),
+        measures=compute_measures_sparse,
+    ),
+}
+
+
+# =====================================================================
+# 2) Chronométrage
+# =====================================================================
+
+def time_stage(func, repeat):
+    """
+    Exécute func() `repeat` fois (temps perf_counter) puis une fois de plus
+    sous tracemalloc pour le pic mémoire. Retourne (statistiques, dernier résultat).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times = np.asarray(times)
+    stats = {
+        "repeat": repeat,
+        "median": float(np.median(times)),
+        "p10": float(np.percentile(times, 10)),
+        "p90": float(np.percentile(times, 90)),
+        "min": float(times.min()),
+        "max": float(times.max()),
+        "peak_memory": int(peak),
+    }
+    return stats, result
+
+
+def run_suite(sizes, models, engines, repeat=5, seed=0, model_params=None, log=print):
+    """
+    Balaye tailles x modèles x moteurs. Les étapes communes ("generate",
+    "read" du CSV) sont enregistrées avec engine=None.
+    Retourne la liste des enregistrements (un par étape).
+    """
+    records = []
+
+    def record(engine, model, n, stage, stats, **extra):
+        records.append({"engine": engine, "model": model, "n": n, "stage": stage, **stats, **extra})
+        log(f"{engine or '-':>12} {model:>10} n={n:<6} {stage:<9} "
+            f"médiane {stats['median'] * 1e3:10.2f} ms  pic {stats['peak_memory'] / 2**20:8.2f} Mo")
+
+    for model in models:
+        params = (model_params or {}).get(model, {})
+        for n in sizes:
+            stats, generated = time_stage(
+                lambda: generate_preferences_ids(n, n, seed=seed, model=model, **params), repeat)
+            record(None, model, n, "generate", stats)
+            bench = BenchInstance(*generated)
+
+            with tempfile.TemporaryDirectory() as tmp:
+                filename = os.path.join(tmp, "instance.csv")
+                save_to_csv(bench.students, bench.schools, *bench.prefs, filename=filename)
+                stats, _ = time_stage(lambda: read_instance(filename), repeat)
+                record(None, model, n, "read", stats)
+
+            for name in engines:
+                engine = ENGINES[name]
+                stats, state = time_stage(lambda: engine.prepare(bench), repeat)
+                record(name, model, n, "prepare", stats)
+
+                stats, matching = time_stage(lambda: engine.solve(state, None), repeat)
+                tracer = Tracer("counters")
+                engine.solve(state, tracer)
+                proposals = tracer.counters["proposals"] or None  # None : moteur non instrumenté
+                record(name, model, n, "solve", stats, proposals=proposals)
+
+                if engine.measures is not None:
+                    stats, _ = time_stage(lambda: engine.measures(state, matching), repeat)
+                    record(name, model, n, "measures", stats)
+
+    return records
+
+
+def scaling_exponents(records):
+    """
+    Pente de log(temps médian) en fonction de log(n) pour chaque
+    (moteur, modèle, étape) mesuré sur au moins deux tailles : ~2 pour O(n²).
+    """
+    groups = {}
+    for r in records:
+        groups.setdefault((r["engine"], r["model"], r["stage"]), []).append((r["n"], r["median"]))
+
+    curves = []
+    for (engine, model, stage), points in groups.items():
+        points = sorted(p for p in points if p[1] > 0)
+        if len({n for n, _ in points}) < 2:
+            continue
+        n, t = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+        curves.append({"engine": engine, "model": model, "stage": stage,
+                       "exponent": float(np.polyfit(n, t, 1)[0])})
+    return curves
+
+
+# =====================================================================
+# 3) Comparaison avec une référence
+# =====================================================================
+
+def compare_to_baseline(records, baseline, tolerance=0.2, min_time=1e-3):
+    """
+    Régressions : étapes dont la médiane dépasse celle de la référence de plus
+    de `tolerance` (fraction) et de plus de min_time secondes (bruit).
+    Retourne la liste des régressions (dictionnaires).
+    """
+    def key(r):
+        return r["engine"], r["model"], r["n"], r["stage"]
+
+    reference = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in records:
+        base = reference.get(key(r))
+        if base is None:
+            continue
+        if r["median"] > base["median"] * (1 + tolerance) and r["median"] - base["median"] > min_time:
+            regressions.append({
+                "engine": r["engine"], "model": r["model"], "n": r["n"], "stage": r["stage"],
+                "baseline": base["median"], "median": r["median"], "ratio": r["median"] / base["median"],
+            })
+    return regressions
+
+
+def plot_scaling(records, filename):
+    """Courbes temps médian de résolution vs n (échelle log-log), une par moteur et modèle."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(7, 4))
+    curves = {}
+    for r in records:
+        if r["stage"] == "solve":
+            curves.setdefault((r["engine"], r["model"]), []).append((r["n"], r["median"]))
+    for (engine, model), points in sorted(curves.items()):
+        points.sort()
+        ax.plot([p[0] for p in points], [p[1] for p in points], marker="o", label=f"{engine} / {model}")
+
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("n (étudiants = écoles)")
+    ax.set_ylabel("Temps médian de résolution (s)")
+    ax.set_title("Passage à l'échelle des moteurs")
+    ax.grid(True, which="both", linestyle="--", alpha=0.5)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(filename, dpi=150)
+    plt.close(fig)
+
+
+# =====================================================================
+# 4) Ligne de commande
+# =====================================================================
+
+def _number(value):
+    """Entier si la valeur s'écrit comme un entier ("3"), sinon flottant ("0.3")."""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_model_params(items):
+    """
+    ["mallows.phi=0.3", "euclidean.dim=3"] -> {"mallows": {"phi": 0.3}, "euclidean": {"dim": 3}}
+    Les valeurs entières restent des int (dimensions, tailles), les autres sont des float.
+    """
+    params = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        model, _, param = name.partition(".")
+        if not param or not value:
+            raise argparse.ArgumentTypeError(f"Paramètre invalide : {item!r} (attendu : modèle.param=valeur)")
+        try:
+            params.setdefault(model, {})[param] = _number(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Valeur non numérique : {item!r}") from None
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de vitesse des moteurs de mariage stable.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--models", nargs="+", default=["uniform"],
+                        choices=["uniform", "master", "mallows", "euclidean"])
+    parser.add_argument("--engines", nargs="+", default=["fast"], choices=sorted(ENGINES))
+    parser.add_argument("--param", action="append", metavar="MODELE.PARAM=VALEUR",
+                        help="paramètre d'un modèle, ex. mallows.phi=0.3 (répétable)")
+    parser.add_argument("--repeat", type=int, default=5, help="exécutions chronométrées par étape")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="ralentissement toléré par rapport à la référence (0.2 = +20 %%)")
+    parser.add_argument("--plot", help="fichier PNG des courbes de passage à l'échelle")
+    args = parser.parse_args(argv)
+
+    records = run_suite(args.sizes, args.models, args.engines, repeat=args.repeat,
+                        seed=args.seed, model_params=parse_model_params(args.param))
+
+    output = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "args": vars(args),
+        },
+        "results": records,
+        "scaling": scaling_exponents(records),
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        output["regressions"] = compare_to_baseline(records, baseline, args.tolerance)
+        for r in output["regressions"]:
+            print(f"RÉGRESSION {r['engine'] or '-'} {r['model']} n={r['n']} {r['stage']} : "
+                  f"{r['baseline'] * 1e3:.2f} ms -> {r['median'] * 1e3:.2f} ms (x{r['ratio']:.2f})")
+        status = 1 if output["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Résultats écrits dans '{args.output}'.")
+
+    for curve in output["scaling"]:
+        print(f"{curve['engine'] or '-':>12} {curve['model']:>10} {curve['stage']:<9} "
+              f"temps ~ n^{curve['exponent']:.2f}")
+
+    if args.plot:
+        plot_scaling(records, args.plot)
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from gale_shapley import IndexedInstance
+
+
+# =====================================================================
+# Format binaire d'une instance
+# =====================================================================
+#
+#   en-tête (32 octets, little-endian) :
+#       magic (8s) | n_students (I) | n_schools (I) | itemsize (I)
+#       names_size (I) | data_offset (Q)
+#   table des noms : étudiants puis écoles, UTF-8, séparés par "\n"
+#   bourrage jusqu'à data_offset (multiple de 8)
+#   matrice des étudiants : n_students x n_schools identifiants d'écoles
+#   matrice des écoles    : n_schools x n_students identifiants d'étudiants
+#
+# Les matrices sont en int16 si les identifiants tiennent sur 16 bits,
+# sinon en int32.
+
+MAGIC = b"GSINST01"
+HEADER = struct.Struct("<8sIIIIQ")
+
+
+def _matrix_dtype(n_students, n_schools):
+    return np.dtype("<i2") if max(n_students, n_schools) <= np.iinfo(np.int16).max else np.dtype("<i4")
+
+
+def write_binary_instance(filename, students, schools, prefs_students, prefs_schools):
+    """
+    Écrit une instance encodée en entiers.
+    prefs_students[s][k] : identifiant de la k-ième école préférée de l'étudiant s
+    prefs_schools[e][k]  : identifiant du k-ième étudiant préféré de l'école e
+    """
+    n_students, n_schools = len(students), len(schools)
+    dtype = _matrix_dtype(n_students, n_schools)
+
+    matrix_students = np.asarray(prefs_students).astype(dtype, copy=False).reshape(n_students, n_schools)
+    matrix_schools = np.asarray(prefs_schools).astype(dtype, copy=False).reshape(n_schools, n_students)
+
+    names = "\n".join(list(students) + list(schools)).encode("utf-8")
+    data_offset = -(-(HEADER.size + len(names)) // 8) * 8
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n_students, n_schools, dtype.itemsize, len(names), data_offset))
+        f.write(names)
+        f.write(b"\0" * (data_offset - HEADER.size - len(names)))
+        f.write(np.ascontiguousarray(matrix_students).tobytes())
+        f.write(np.ascontiguousarray(matrix_schools).tobytes())
+
+
+def read_binary_instance(filename):
+    """
+    Lit une instance binaire sans copier les préférences : les deux matrices
+    sont des np.memmap en lecture seule sur le fichier.
+    Retourne (students, schools, prefs_students, prefs_schools).
+    """
+    with open(filename, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:8] != MAGIC:
+            raise ValueError(f"'{filename}' n'est pas une instance binaire.")
+        _, n_students, n_schools, itemsize, names_size, data_offset = HEADER.unpack(header)
+        if os.fstat(f.fileno()).st_size < data_offset + 2 * n_students * n_schools * itemsize:
+            raise ValueError(f"'{filename}' est tronqué.")
+        names = f.read(names_size).decode("utf-8").split("\n") if names_size else []
+
+    students = names[:n_students]
+    schools = names[n_students:]
+    dtype = np.dtype("<i2") if itemsize == 2 else np.dtype("<i4")
+
+    prefs_students = np.memmap(filename, dtype=dtype, mode="r",
+                               offset=data_offset, shape=(n_students, n_schools))
+    prefs_schools = np.memmap(filename, dtype=dtype, mode="r",
+                              offset=data_offset + n_students * n_schools * itemsize,
+                              shape=(n_schools, n_students))
+    return students, schools, prefs_students, prefs_schools
+
+
+# =====================================================================
+# Conversions vers les autres représentations
+# =====================================================================
+
+def _flat_ranks(prefs):
+    """Table de rangs inverse (plate, array('i')) calculée avec NumPy."""
+    ranks = np.empty(prefs.shape, dtype=np.intc)
+    positions = np.broadcast_to(np.arange(prefs.shape[1], dtype=np.intc), prefs.shape)
+    np.put_along_axis(ranks, prefs.astype(np.intp), positions, axis=1)
+    return array("i", ranks.tobytes())
+
+
+def indexed_from_matrices(students, schools, prefs_students, prefs_schools):
+    """IndexedInstance (gale_shapley.py) à partir de deux matrices d'identifiants."""
+    prefs_students = np.asarray(prefs_students)
+    prefs_schools = np.asarray(prefs_schools)
+    return IndexedInstance(
+        students, schools,
+        array("i", prefs_students.astype(np.intc).tobytes()),
+        array("i", prefs_schools.astype(np.intc).tobytes()),
+        rank_students=_flat_ranks(prefs_students),
+        rank_schools=_flat_ranks(prefs_schools),
+    )
+
+
+def load_indexed_instance(filename):
+    """Charge une instance binaire directement sous forme d'IndexedInstance."""
+    return indexed_from_matrices(*read_binary_instance(filename))
+
+
+def to_prefs_dicts(students, schools, prefs_students, prefs_schools):
+    """Dictionnaires de noms au format de read_instance()."""
+    prefs_s = {s: [schools[e] for e in row] for s, row in zip(students, prefs_students.tolist())}
+    prefs_e = {e: [students[s] for s in row] for e, row in zip(schools, prefs_schools.tolist())}
+    return prefs_s, prefs_e
@@ -0,0 +1,276 @@
+from array import array
+from collections import deque
+
+from tracing import ACCEPTED, REJECTED, active_tracer
+
+SIDES = ("students", "schools")  # côté qui propose
+
+
+# =====================================================================
+# 1) Encodage entier de l'instance
+# =====================================================================
+
+class IndexedInstance:
+    """
+    Instance encodée en entiers : chaque nom reçoit un identifiant une seule
+    fois et les préférences sont rangées dans des tableaux plats (par ligne).
+
+      - prefs_students[s * n_schools + k] : k-ième école préférée de s
+      - prefs_schools[e * n_students + k] : k-ième étudiant préféré de e
+      - rank_students[s * n_schools + e]  : rang de l'école e pour s
+      - rank_schools[e * n_students + s]  : rang de l'étudiant s pour e
+    """
+
+    def __init__(self, students, schools, prefs_students, prefs_schools,
+                 rank_students=None, rank_schools=None):
+        self.students = students
+        self.schools = schools
+        self.n_students = len(students)
+        self.n_schools = len(schools)
+
+        self.prefs_students = prefs_students
+        self.prefs_schools = prefs_schools
+
+        # les tables de rangs peuvent être fournies déjà calculées (ex. NumPy)
+        if rank_students is None:
+            rank_students = inverse_ranks(prefs_students, self.n_students, self.n_schools)
+        if rank_schools is None:
+            rank_schools = inverse_ranks(prefs_schools, self.n_schools, self.n_students)
+        self.rank_students = rank_students
+        self.rank_schools = rank_schools
+
+        self._student_ids = None
+        self._school_ids = None
+
+    @property
+    def student_ids(self):
+        """Table nom -> identifiant des étudiants (construite à la demande)."""
+        if self._student_ids is None:
+            self._student_ids = {name: i for i, name in enumerate(self.students)}
+        return self._student_ids
+
+    @property
+    def school_ids(self):
+        """Table nom -> identifiant des écoles (construite à la demande)."""
+        if self._school_ids is None:
+            self._school_ids = {name: i for i, name in enumerate(self.schools)}
+        return self._school_ids
+
+
+def inverse_ranks(prefs, n_rows, n_cols):
+    """
+    Construit la table des rangs inverse d'une matrice de préférences plate :
+    rank[r * n_cols + prefs[r * n_cols + k]] = k.
+    """
+    rank = array("i", bytes(4 * n_rows * n_cols))
+    for r in range(n_rows):
+        base = r * n_cols
+        for k in range(n_cols):
+            rank[base + prefs[base + k]] = k
+    return rank
+
+
+def index_instance(prefs_students, prefs_schools):
+    """
+    Encode une instance lue par read_instance() (dictionnaires de noms).
+    Les identifiants suivent l'ordre des clés des dictionnaires.
+    """
+    students = list(prefs_students)
+    schools = list(prefs_schools)
+    student_ids = {name: i for i, name in enumerate(students)}
+    school_ids = {name: i for i, name in enumerate(schools)}
+
+    flat_students = array("i")
+    for s in students:
+        if len(prefs_students[s]) != len(schools):
+            raise ValueError(f"L'étudiant {s} doit classer toutes les écoles.")
+        try:
+            flat_students.extend(school_ids[e] for e in prefs_students[s])
+        except KeyError as exc:
+            raise ValueError(f"L'étudiant {s} classe une école inconnue : {exc.args[0]}") from None
+
+    flat_schools = array("i")
+    for e in schools:
+        if len(prefs_schools[e]) != len(students):
+            raise ValueError(f"L'école {e} doit classer tous les étudiants.")
+        try:
+            flat_schools.extend(student_ids[s] for s in prefs_schools[e])
+        except KeyError as exc:
+            raise ValueError(f"L'école {e} classe un étudiant inconnu : {exc.args[0]}") from None
+
+    instance = IndexedInstance(students, schools, flat_students, flat_schools)
+    instance._student_ids = student_ids
+    instance._school_ids = school_ids
+    return instance
+
+
+# =====================================================================
+# 2) Algorithme de Gale–Shapley sur les identifiants entiers
+# =====================================================================
+
+def deferred_acceptance(n_proposers, n_receivers, prefs, rank, tracer=None):
+    """
+    Acceptation différée générique (les "proposants" proposent).
+
+    prefs[p * n_receivers + k] : k-ième choix du proposant p
+    rank[r * n_proposers + p]  : rang du proposant p pour le receveur r
+
+    Chaque proposition coûte O(1) : pointeur "prochain choix" par proposant,
+    comparaison de deux rangs, file (deque) des proposants libres.
+    tracer (tracing.py) reçoit les propositions en identifiants (proposant, receveur).
+    Retourne match_receiver : receveur -> proposant (-1 si libre).
+    """
+    tracer = active_tracer(tracer)
+    next_choice = [0] * n_proposers
+    match_receiver = [-1] * n_receivers
+    free = deque(range(n_proposers))
+
+    while free:
+        p = free.popleft()
+        base = p * n_receivers
+
+        while next_choice[p] < n_receivers:
+            r = prefs[base + next_choice[p]]
+            next_choice[p] += 1
+
+            current = match_receiver[r]
+            if current == -1:
+                match_receiver[r] = p
+                if tracer:
+                    tracer.proposal(p, r, True)
+                break
+
+            row = r * n_proposers
+            if rank[row + p] < rank[row + current]:
+                match_receiver[r] = p
+                free.appendleft(current)  # l'ancien candidat repropose aussitôt
+                if tracer:
+                    tracer.proposal(p, r, True, current)
+                break
+
+            if tracer:
+                tracer.proposal(p, r, False)
+
+    return match_receiver
+
+
+def gale_shapley(instance, side="students", tracer=None):
+    """
+    Gale–Shapley sur une IndexedInstance, les mêmes tables servant aux deux sens.
+    side="students" : étudiants proposants (matching étudiant-optimal)
+    side="schools"  : écoles proposantes (matching école-optimal)
+    Retourne toujours match_school : école -> étudiant (-1 si l'école reste libre).
+    """
+    if side == "students":
+        return deferred_acceptance(
+            instance.n_students, instance.n_schools,
+            instance.prefs_students, instance.rank_schools, tracer
+        )
+    if side == "schools":
+        match_student = deferred_acceptance(
+            instance.n_schools, instance.n_students,
+            instance.prefs_schools, instance.rank_students, tracer
+        )
+        match_school = [-1] * instance.n_schools
+        for s, e in enumerate(match_student):
+            if e != -1:
+                match_school[e] = s
+        return match_school
+    raise ValueError(f"Côté proposant inconnu : {side!r} (attendu : {' ou '.join(SIDES)})")
+
+
+def iter_proposals(instance):
+    """
+    Gale–Shapley étudiant-proposant pas à pas, dans le même ordre que
+    gale_shapley() : produit un événement compact par proposition,
+    (étudiant, école, issue, évincé) en identifiants, avec issue = ACCEPTED ou
+    REJECTED (tracing.py) et évincé = -1 si personne n'est évincé.
+    """
+    n, m = instance.n_students, instance.n_schools
+    prefs, rank = instance.prefs_students, instance.rank_schools
+
+    next_choice = [0] * n
+    match_school = [-1] * m
+    free = deque(range(n))
+
+    while free:
+        s = free.popleft()
+        base = s * m
+
+        while next_choice[s] < m:
+            e = prefs[base + next_choice[s]]
+            next_choice[s] += 1
+
+            current = match_school[e]
+            if current == -1 or rank[e * n + s] < rank[e * n + current]:
+                match_school[e] = s
+                if current != -1:
+                    free.appendleft(current)
+                yield s, e, ACCEPTED, current
+                break
+
+            yield s, e, REJECTED, -1
+
+
+def _solve_side(task):
+    instance, side = task
+    return gale_shapley(instance, side)
+
+
+def solve_both(instance, parallel=None):
+    """
+    Les deux matchings extrêmes sur la même instance encodée :
+    {"students": match_school étudiant-optimal, "schools": match_school école-optimal}.
+
+    parallel = None (en série, par défaut), "thread" ou "process". La boucle
+    est en Python pur : avec "thread", le GIL sérialise les deux résolutions
+    (aucun gain). "process" copie l'instance dans chaque processus ; ce coût
+    de sérialisation n'est amorti que pour de grandes instances (à n = 2000,
+    il est encore plus lent que la version série).
+    """
+    tasks = [(instance, side) for side in SIDES]
+    # importé à l'usage : multiprocessing coûte plus cher que tout le reste du module
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if parallel is None:
+        results = [_solve_side(task) for task in tasks]
+    elif parallel == "thread":
+        with ThreadPoolExecutor(max_workers=len(SIDES)) as executor:
+            results = list(executor.map(_solve_side, tasks))
+    elif parallel == "process":
+        with ProcessPoolExecutor(max_workers=len(SIDES)) as executor:
+            results = list(executor.map(_solve_side, tasks))
+    else:
+        raise ValueError(f"Mode parallèle inconnu : {parallel!r}")
+
+    return dict(zip(SIDES, results))
+
+
+def to_engaged(instance, match_school):
+    """Reconvertit match_school en dictionnaire {école: étudiant ou None}."""
+    students = instance.students
+    return {
+        e: (students[s] if s != -1 else None)
+        for e, s in zip(instance.schools, match_school)
+    }
+
+
+def mariage_stable_fast(pref_student, pref_school, side="students", tracer=None):
+    """
+    Même résultat que mariage_stable() (dictionnaire engaged), en O(n²) :
+    les noms sont convertis en entiers et les rangs précalculés une fois.
+    side="schools" donne le matching école-optimal, toujours indexé par école.
+    """
+    instance = index_instance(pref_student, pref_school)
+    return to_engaged(instance, gale_shapley(instance, side, tracer))
+
+
+if __name__ == "__main__":
+    from mariage_stable_mesure import read_instance
+
+    prefs_students, prefs_schools = read_instance("instance_vrais_noms.csv")
+    engaged = mariage_stable_fast(prefs_students, prefs_schools)
+
+    print("\n résultat du mariage stable :")
+    for e, s in engaged.items():
+        print(f"  {e} <- {s}")
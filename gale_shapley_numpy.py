@@ -0,0 +1,117 @@
+import numpy as np
+
+
+# =====================================================================
+# 1) Tenseurs de préférences et de rangs
+# =====================================================================
+
+def rank_tensor(prefs):
+    """
+    Inverse une pile de matrices de préférences de forme (k, a, b) :
+    ranks[i, r, prefs[i, r, j]] = j.
+    """
+    ranks = np.empty_like(prefs)
+    positions = np.broadcast_to(np.arange(prefs.shape[2], dtype=prefs.dtype), prefs.shape)
+    np.put_along_axis(ranks, prefs, positions, axis=2)
+    return ranks
+
+
+def stack_instances(instances):
+    """
+    Empile des IndexedInstance (gale_shapley.py) de même taille en deux
+    tenseurs (k, n_students, n_schools) et (k, n_schools, n_students).
+    """
+    n_students = instances[0].n_students
+    n_schools = instances[0].n_schools
+
+    prefs_students = np.stack([
+        np.frombuffer(inst.prefs_students, dtype=np.intc).reshape(n_students, n_schools)
+        for inst in instances
+    ])
+    prefs_schools = np.stack([
+        np.frombuffer(inst.prefs_schools, dtype=np.intc).reshape(n_schools, n_students)
+        for inst in instances
+    ])
+    return prefs_students, prefs_schools
+
+
+# =====================================================================
+# 2) Gale–Shapley vectorisé sur k instances à la fois
+# =====================================================================
+
+def gale_shapley_batch(prefs_students, prefs_schools):
+    """
+    Résout k instances en même temps (étudiants proposants).
+
+    prefs_students : (k, n_students, n_schools), identifiants d'écoles
+    prefs_schools  : (k, n_schools, n_students), identifiants d'étudiants
+
+    À chaque tour, tous les étudiants libres (de toutes les instances)
+    proposent à leur prochain choix ; chaque école garde la meilleure offre
+    (minimum de rang entre son candidat actuel et les nouveaux proposants).
+    Le résultat est le matching stable étudiant-optimal de chaque instance.
+
+    Retourne match_school : (k, n_schools), école -> étudiant (-1 si libre).
+    """
+    k, n_students, n_schools = prefs_students.shape
+    rank_schools = rank_tensor(prefs_schools)
+
+    next_choice = np.zeros((k, n_students), dtype=np.intp)
+    free = np.ones((k, n_students), dtype=bool)
+    match_school = np.full((k, n_schools), -1, dtype=np.intp)
+    held_rank = np.full((k, n_schools), n_students, dtype=np.intp)  # n = aucun candidat
+
+    while True:
+        inst, stud = np.nonzero(free & (next_choice < n_schools))
+        if inst.size == 0:
+            break
+
+        school = prefs_students[inst, stud, next_choice[inst, stud]]
+        next_choice[inst, stud] += 1
+        offer_rank = rank_schools[inst, school, stud]
+
+        # meilleure offre par (instance, école), candidat actuel compris
+        best = held_rank.copy()
+        np.minimum.at(best, (inst, school), offer_rank)
+        winners = offer_rank == best[inst, school]
+
+        w_inst, w_school, w_stud = inst[winners], school[winners], stud[winners]
+        previous = match_school[w_inst, w_school]
+        displaced = previous != -1
+        free[w_inst[displaced], previous[displaced]] = True
+
+        match_school[w_inst, w_school] = w_stud
+        free[w_inst, w_stud] = False
+        held_rank = best
+
+    return match_school
+
+
+def match_students_batch(match_school, n_students):
+    """Inverse match_school (k, n_schools) en match_student (k, n_students)."""
+    k, n_schools = match_school.shape
+    match_student = np.full((k, n_students), -1, dtype=np.intp)
+    inst, school = np.nonzero(match_school != -1)
+    match_student[inst, match_school[inst, school]] = school
+    return match_student
+
+
+def rank_arrays_batch(prefs_students, prefs_schools, match_school):
+    """
+    Rangs obtenus dans k matchings, pour rank_summary() (measures.py) :
+    ranks_students (k, n_students) et ranks_schools (k, n_schools), int32,
+    -1 pour un agent libre.
+    """
+    k, n_students, n_schools = prefs_students.shape
+    match_school = np.asarray(match_school)
+    match_student = match_students_batch(match_school, n_students)
+
+    ranks_students = np.full((k, n_students), -1, dtype=np.int32)
+    inst, stud = np.nonzero(match_student != -1)
+    ranks_students[inst, stud] = rank_tensor(prefs_students)[inst, stud, match_student[inst, stud]]
+
+    ranks_schools = np.full((k, n_schools), -1, dtype=np.int32)
+    inst, school = np.nonzero(match_school != -1)
+    ranks_schools[inst, school] = rank_tensor(prefs_schools)[inst, school, match_school[inst, school]]
+
+    return ranks_students, ranks_schools
@@ -1,10 +1,30 @@
 import csv
 import random
 import sys
-
-from faker import Faker # il faut faire pip install faker
-
-fake = Faker('fr_FR')
+from collections.abc import Sequence
+
+from binary_instance import write_binary_instance
+from preference_models import generate_model_matrices
+
+_fake = None
+
+
+def faker_fr(seed=None):
+    """
+    Générateur Faker('fr_FR') partagé, créé au premier appel (l'import de faker est lent).
+    Avec seed, retourne un générateur neuf et initialisé : l'instance partagée
+    n'est jamais réinitialisée (elle peut servir en même temps à un autre thread).
+    """
+    global _fake
+    if seed is not None:
+        from faker import Faker
+        fake = Faker('fr_FR')
+        fake.seed_instance(seed)
+        return fake
+    if _fake is None:
+        from faker import Faker  # il faut faire pip install faker
+        _fake = Faker('fr_FR')
+    return _fake
 
 SCHOOLS_FR = [
     "École Polytechnique", "HEC Paris", "Sorbonne Université", "INSA Lyon",
@@ -29,21 +49,66 @@ SCHOOLS_FR = [
 ]
 
 
-def generate_preferences(n_students, n_schools):
-    """Génère des préférences aléatoires pour n étudiants et n écoles."""
-    students = list({fake.first_name() for _ in range(n_students * 2)})[:n_students]
-    schools = random.sample(SCHOOLS_FR, n_schools)
+def generate_preferences(n_students, n_schools, seed=None):
+    """
+    Génère des préférences aléatoires pour n étudiants et n écoles.
+    Avec seed, l'instance est reproductible (sans toucher à l'état global de random).
+    Les noms viennent de Faker et de SCHOOLS_FR : pour de grandes instances,
+    utiliser generate_preferences_ids().
+    """
+    fake = faker_fr(seed)
+    rng = random if seed is None else random.Random(seed)
+
+    # dict.fromkeys : dédoublonne en gardant l'ordre (un set dépend du hash seed du processus)
+    students = list(dict.fromkeys(fake.first_name() for _ in range(n_students * 2)))[:n_students]
+    schools = rng.sample(SCHOOLS_FR, n_schools)
 
     prefs_students = {
-        s: random.sample(schools, len(schools)) for s in students
+        s: rng.sample(schools, len(schools)) for s in students
     }
     prefs_schools = {
-        e: random.sample(students, len(students)) for e in schools
+        e: rng.sample(students, len(students)) for e in schools
     }
 
     return students, schools, prefs_students, prefs_schools
 
 
+class SyntheticNames(Sequence):
+    """
+    Noms synthétiques "Etudiant1", "Etudiant2", ... créés seulement quand on
+    les lit (affichage, export) : rien n'est stocké pour n agents.
+    """
+
+    def __init__(self, prefix, n):
+        self.prefix = prefix
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.n))]
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return f"{self.prefix}{i + 1}"
+
+
+def generate_preferences_ids(n_students, n_schools, seed=None, model="uniform", **params):
+    """
+    Génère une instance de taille quelconque en identifiants entiers, sans Faker.
+    model : "uniform" (chaque ligne permutée par numpy.random.Generator.permuted),
+    "master", "mallows" ou "euclidean" (voir preference_models.py, paramètres
+    de corrélation passés par **params).
+    Retourne (students, schools, prefs_students, prefs_schools) où les matrices
+    sont des np.ndarray int32 et les noms des SyntheticNames.
+    """
+    prefs_students, prefs_schools = generate_model_matrices(model, n_students, n_schools, seed=seed, **params)
+    return SyntheticNames("Etudiant", n_students), SyntheticNames("Ecole", n_schools), prefs_students, prefs_schools
+
+
 def save_to_csv(students, schools, prefs_students, prefs_schools, filename="instance_vrais_noms.csv"):
     """Enregistre les préférences dans un fichier CSV."""
 
@@ -67,6 +132,56 @@ def save_to_csv(students, schools, prefs_students, prefs_schools, filename="inst
     print(f" Fichier '{filename}' généré avec succès !")
 
 
+def generate_capacities(schools, n_students, seed=None):
+    """
+    Répartit aléatoirement n_students places entre les écoles (au moins une
+    place par école) : {école: capacité}.
+    """
+    rng = random.Random(seed)
+    capacities = {e: 1 for e in schools}
+    for _ in range(max(0, n_students - len(schools))):
+        capacities[rng.choice(schools)] += 1
+    return capacities
+
+
+def save_to_csv_capacities(students, schools, prefs_students, prefs_schools, capacities,
+                           filename="instance_capacites.csv"):
+    """Comme save_to_csv(), avec une colonne "Capacité" remplie pour les écoles."""
+
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+
+        # En-têtes
+        writer.writerow(["Type", "Nom", "Préférences", "Capacité"])
+
+        # Étudiants
+        for s in students:
+            writer.writerow(["Etudiant", s, " - ".join(prefs_students[s]), ""])
+
+        # Séparateur vide
+        writer.writerow([])
+
+        # Écoles
+        for e in schools:
+            writer.writerow(["Ecole", e, " - ".join(prefs_schools[e]), capacities[e]])
+
+    print(f" Fichier '{filename}' généré avec succès !")
+
+
+def save_to_binary(students, schools, prefs_students, prefs_schools, filename="instance_vrais_noms.gsinst"):
+    """Enregistre les préférences au format binaire compact (voir binary_instance.py)."""
+    student_ids = {s: i for i, s in enumerate(students)}
+    school_ids = {e: i for i, e in enumerate(schools)}
+
+    write_binary_instance(
+        filename, students, schools,
+        [[school_ids[e] for e in prefs_students[s]] for s in students],
+        [[student_ids[s] for s in prefs_schools[e]] for e in schools],
+    )
+
+    print(f" Fichier '{filename}' généré avec succès !")
+
+
 if __name__ == "__main__":
     # Récupération des arguments depuis la ligne de commande
     if len(sys.argv) != 3:
@@ -0,0 +1,200 @@
+import csv
+from collections import deque
+from heapq import heappush, heapreplace
+
+from gale_shapley import index_instance
+
+
+# =====================================================================
+# 1) Lecture d'une instance avec capacités
+# =====================================================================
+
+def read_instance_capacities(filename="instance_capacites.csv"):
+    """
+    Lit un fichier CSV écrit par save_to_csv_capacities() (colonne "Capacité"
+    en plus de Type, Nom, Préférences) et retourne :
+      - prefs_students : {étudiant: [écoles...]}
+      - prefs_schools  : {école: [étudiants...]}
+      - capacities     : {école: nombre de places} (1 si la colonne est vide)
+    """
+    prefs_students = {}
+    prefs_schools = {}
+    capacities = {}
+
+    with open(filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)  # sauter l'en-tête
+
+        for row in reader:
+            if not row or len(row) < 3:
+                continue
+
+            entity_type, name, preferences = row[:3]
+            prefs_list = [p.strip() for p in preferences.split(" - ")]
+
+            if entity_type == "Etudiant":
+                prefs_students[name] = prefs_list
+            elif entity_type == "Ecole":
+                prefs_schools[name] = prefs_list
+                capacity = row[3].strip() if len(row) > 3 else ""
+                capacities[name] = int(capacity) if capacity else 1
+
+    return prefs_students, prefs_schools, capacities
+
+
+# =====================================================================
+# 2) Gale–Shapley avec quotas (hôpitaux / résidents)
+# =====================================================================
+
+def gale_shapley_capacities(instance, capacities):
+    """
+    Étudiants proposants, chaque école e accepte au plus capacities[e] étudiants.
+    Les admis provisoires d'une école sont dans un tas borné ordonné par
+    rang décroissant : le moins bien classé est évincé en O(log q).
+
+    capacities : liste indexée par identifiant d'école.
+    Retourne admitted : école -> liste d'identifiants d'étudiants (du mieux
+    classé au moins bien classé par l'école).
+    """
+    n, m = instance.n_students, instance.n_schools
+    prefs = instance.prefs_students
+    rank = instance.rank_schools
+
+    next_choice = [0] * n
+    heaps = [[] for _ in range(m)]  # (-rang, étudiant) : heap[0] = pire admis
+    free = deque(range(n))
+
+    while free:
+        s = free.popleft()
+        base = s * m
+
+        while next_choice[s] < m:
+            e = prefs[base + next_choice[s]]
+            next_choice[s] += 1
+
+            capacity = capacities[e]
+            if capacity <= 0:
+                continue
+
+            heap = heaps[e]
+            r = rank[e * n + s]
+            if len(heap) < capacity:
+                heappush(heap, (-r, s))
+                break
+            if r < -heap[0][0]:
+                _, worst = heapreplace(heap, (-r, s))
+                free.appendleft(worst)  # l'évincé repropose aussitôt
+                break
+
+    return [[s for _, s in sorted(heap, reverse=True)] for heap in heaps]
+
+
+def mariage_stable_capacites(pref_student, pref_school, capacities):
+    """
+    Variante à capacités de mariage_stable().
+    Retourne {école: [étudiants admis]}, du mieux au moins bien classé.
+    """
+    instance = index_instance(pref_student, pref_school)
+    admitted = gale_shapley_capacities(instance, [capacities[e] for e in instance.schools])
+    students = instance.students
+    return {e: [students[s] for s in admitted[i]] for i, e in enumerate(instance.schools)}
+
+
+# =====================================================================
+# 3) Mesures tenant compte des capacités
+# =====================================================================
+
+def compute_ranks_capacities(prefs_students, prefs_schools, admissions):
+    """
+    ranks_students[s] = rang de l'école obtenue par s (None si non affecté)
+    ranks_seats       = rangs des étudiants admis, place par place
+    """
+    match_student = {s: e for e, admitted in admissions.items() for s in admitted}
+
+    ranks_students = {
+        s: (prefs.index(match_student[s]) if s in match_student else None)
+        for s, prefs in prefs_students.items()
+    }
+
+    ranks_seats = []
+    for e, admitted in admissions.items():
+        position = {s: k for k, s in enumerate(prefs_schools[e])}
+        ranks_seats.extend(position[s] for s in admitted)
+
+    return ranks_students, ranks_seats
+
+
+def is_stable_capacities(prefs_students, prefs_schools, capacities, admissions):
+    """
+    Absence de paire bloquante (s, e) : s préfère e à son affectation (ou n'est
+    pas affecté) et e a une place libre ou préfère s à son pire admis.
+    """
+    match_student = {s: e for e, admitted in admissions.items() for s in admitted}
+
+    for e, prefs_e in prefs_schools.items():
+        if capacities[e] <= 0:
+            continue  # une école sans place ne peut pas bloquer
+
+        admitted = set(admissions.get(e, []))
+        position = {s: k for k, s in enumerate(prefs_e)}
+        has_room = len(admitted) < capacities[e]
+        worst = max((position[s] for s in admitted), default=len(prefs_e))
+
+        for s in prefs_e:
+            if not has_room and position[s] >= worst:
+                break  # plus aucun étudiant préféré au pire admis
+            if s in admitted:
+                continue
+            current = match_student.get(s)
+            if current is None or prefs_students[s].index(e) < prefs_students[s].index(current):
+                return False
+
+    return True
+
+
+def compute_all_measures_capacities(prefs_students, prefs_schools, capacities, admissions):
+    """
+    Équivalent de compute_all_measures() pour un matching à capacités ; la clé
+    "stable" (absence de paire bloquante) remplace "pareto_optimal".
+    """
+    n_schools = len(prefs_schools)
+    n_students = len(prefs_students)
+
+    ranks_students, ranks_seats = compute_ranks_capacities(prefs_students, prefs_schools, admissions)
+    matched_ranks = [r for r in ranks_students.values() if r is not None]
+
+    def sat(r, list_length):
+        return 1 - (r / (list_length - 1)) if list_length > 1 else 1.0
+
+    welfare = sum(sat(r, n_schools) for r in matched_ranks) + sum(sat(r, n_students) for r in ranks_seats)
+    total_seats = sum(capacities[e] for e in prefs_schools)
+
+    return {
+        "avg_rank_students": sum(matched_ranks) / len(matched_ranks) if matched_ranks else float('nan'),
+        "avg_rank_schools": sum(ranks_seats) / len(ranks_seats) if ranks_seats else float('nan'),
+        "egalitarian_cost": sum(matched_ranks) + sum(ranks_seats),
+        "welfare": welfare,
+        "stable": is_stable_capacities(prefs_students, prefs_schools, capacities, admissions),
+        "unmatched_students": n_students - len(matched_ranks),
+        "fill_rate": len(ranks_seats) / total_seats if total_seats else float('nan'),
+    }
+
+
+if __name__ == "__main__":
+    prefs_students, prefs_schools, capacities = read_instance_capacities("instance_capacites.csv")
+    admissions = mariage_stable_capacites(prefs_students, prefs_schools, capacities)
+
+    results = compute_all_measures_capacities(prefs_students, prefs_schools, capacities, admissions)
+
+    print("\n=== AFFECTATIONS ===")
+    for e, admitted in admissions.items():
+        print(f"  {e} ({len(admitted)}/{capacities[e]}) : {', '.join(admitted)}")
+
+    print("\n=== MESURES ===")
+    print(f"Rang moyen étudiants : {results['avg_rank_students']:.3f}")
+    print(f"Rang moyen places    : {results['avg_rank_schools']:.3f}")
+    print(f"Coût égalitaire      : {results['egalitarian_cost']}")
+    print(f"Welfare total        : {results['welfare']:.3f}")
+    print(f"Stable ?             : {results['stable']}")
+    print(f"Non affectés         : {results['unmatched_students']}")
+    print(f"Taux de remplissage  : {results['fill_rate']:.1%}")
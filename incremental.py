@@ -0,0 +1,423 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from heapq import heappush, heappop
+
+
+# =====================================================================
+# Re-matching incrémental après de petites modifications
+# =====================================================================
+#
+# Gale–Shapley donne le même matching quel que soit l'ordre des propositions.
+# On garde donc le journal des propositions (par école et par étudiant). Après
+# une modification, le journal est relu dans l'ordre du temps, mais seulement
+# là où l'état réel s'écarte de celui du journal :
+#   - un étudiant désynchronisé (retiré, liste modifiée, issue changée) voit
+#     ses propositions du journal annulées ; libre, il propose en même temps
+#     que le journal (à la place de sa proposition annulée), ou aussitôt si le
+#     journal le garde apparié ;
+#   - une école désynchronisée (candidat retenu différent de celui du journal)
+#     réévalue chaque proposition reçue contre son candidat réel.
+# Un agent se resynchronise dès que son état réel redevient celui du journal :
+# ses événements suivants restent alors valides sans être relus, et le coût
+# suit la longueur des chaînes réellement modifiées, pas la taille du journal.
+#
+# Événement : (temps, étudiant, école, position dans la liste, accepté, évincé)
+# Le temps est un tuple : (horloge,) pour les propositions ajoutées en fin de
+# journal, t + (-passe, i) pour celles insérées juste après l'événement t
+# pendant une relecture (avant tous les événements insérés auparavant après t).
+
+_TIME, _STUDENT, _SCHOOL, _POSITION, _ACCEPTED, _DISPLACED = range(6)
+_LAST = float("inf")  # (t, _LAST) suit tous les événements de temps t
+
+
+class IncrementalMatching:
+    """
+    Matching stable étudiant-optimal maintenu sous modifications :
+    add_student(), withdraw_student(), update_student().
+
+    Les écoles classent tous les étudiants ; les listes des étudiants
+    peuvent être incomplètes. `last_cost` donne, pour la dernière opération,
+    le nombre d'événements du journal relus ("visited"), annulés ou réécrits
+    ("invalidated"), et de nouvelles propositions ("proposals").
+    """
+
+    def __init__(self, prefs_students, prefs_schools):
+        self.schools = list(prefs_schools)
+        self.school_ids = {e: i for i, e in enumerate(self.schools)}
+        self.students = []
+        self.student_ids = {}
+        self.active = []
+        self.prefs = []             # étudiant -> liste d'identifiants d'écoles
+        self.next_choice = []
+        self.match_student = []
+        self.student_events = []
+
+        self.rank = [[] for _ in self.schools]    # école -> rang de chaque étudiant
+        self.match_school = [-1] * len(self.schools)
+        self.school_events = [[] for _ in self.schools]
+        self.clock = 0
+        self.passes = 0             # relectures effectuées (clés des événements insérés)
+        self.last_cost = {"visited": 0, "invalidated": 0, "proposals": 0}
+
+        for s in prefs_students:
+            self._new_student(s, prefs_students[s])
+        for e, prefs in prefs_schools.items():
+            row = self.rank[self.school_ids[e]]
+            for k, s in enumerate(prefs):
+                row[self.student_ids[s]] = k
+
+        self.last_cost["proposals"] = self._run(deque(range(len(self.students))))
+
+    # -----------------------------------------------------------------
+    # Résultat
+    # -----------------------------------------------------------------
+
+    @property
+    def engaged(self):
+        """Dictionnaire {école: étudiant ou None}, comme mariage_stable()."""
+        return {
+            e: (self.students[s] if s != -1 else None)
+            for e, s in zip(self.schools, self.match_school)
+        }
+
+    # -----------------------------------------------------------------
+    # Modifications
+    # -----------------------------------------------------------------
+
+    def add_student(self, name, prefs, school_positions=None):
+        """
+        Ajoute un candidat tardif. school_positions = {école: position} le place
+        dans le classement de ces écoles ; ailleurs il est classé dernier.
+        La position est comptée parmi les étudiants actifs (0 = premier) : les
+        étudiants retirés, qui restent dans les tables de rangs, ne comptent pas.
+        Seule la chaîne de propositions qu'il déclenche est exécutée.
+        """
+        if name in self.student_ids and self.active[self.student_ids[name]]:
+            raise ValueError(f"L'étudiant {name} existe déjà.")
+
+        s = self._new_student(name, prefs)
+        for e, position in (school_positions or {}).items():
+            row = self.rank[self.school_ids[e]]
+            active_ranks = sorted(r for other, r in enumerate(row) if other != s and self.active[other])
+            if position < len(active_ranks):
+                target = active_ranks[position]
+            else:
+                target = active_ranks[-1] + 1 if active_ranks else 0
+            # décaler ceux classés à partir de `target` ne change pas leur ordre relatif
+            for other, r in enumerate(row):
+                if r >= target and other != s:
+                    row[other] = r + 1
+            row[s] = target
+
+        self.last_cost = {"visited": 0, "invalidated": 0, "proposals": self._run(deque([s]))}
+
+    def withdraw_student(self, name):
+        """Retire un étudiant et rejoue les chaînes qui dépendaient de ses propositions."""
+        s = self.student_ids.pop(name)
+        self.active[s] = False
+
+        events = self.student_events[s]
+        if events:
+            self._replay(s, events[0][_TIME], 0)  # son premier événement est sa première proposition
+        else:
+            self.last_cost = {"visited": 0, "invalidated": 0, "proposals": 0}
+
+    def update_student(self, name, prefs):
+        """
+        Remplace la liste d'un étudiant. Les propositions faites selon la partie
+        inchangée de sa liste restent valides ; les suivantes sont rejouées.
+        """
+        s = self.student_ids[name]
+        new_prefs = [self.school_ids[e] for e in prefs]
+        old_prefs = self.prefs[s]
+
+        k0 = 0
+        while k0 < min(len(old_prefs), len(new_prefs)) and old_prefs[k0] == new_prefs[k0]:
+            k0 += 1
+        self.prefs[s] = new_prefs
+
+        start = next((event[_TIME] for event in self.student_events[s]
+                      if event[_STUDENT] == s and event[_POSITION] >= k0), None)
+        if start is not None:
+            self._replay(s, start, k0, old_prefs)
+        else:
+            # aucune proposition au-delà de la partie inchangée : seul un étudiant libre continue
+            free = deque([s]) if self.match_student[s] == -1 else deque()
+            self.last_cost = {"visited": 0, "invalidated": 0, "proposals": self._run(free)}
+
+    # -----------------------------------------------------------------
+    # Mécanique interne
+    # -----------------------------------------------------------------
+
+    def _new_student(self, name, prefs):
+        s = len(self.students)
+        self.students.append(name)
+        self.student_ids[name] = s
+        self.active.append(True)
+        self.prefs.append([self.school_ids[e] for e in prefs])
+        self.next_choice.append(0)
+        self.match_student.append(-1)
+        self.student_events.append([])
+        for row in self.rank:
+            row.append(len(row))  # classé dernier par défaut
+        return s
+
+    def _run(self, free):
+        """Acceptation différée à partir de l'état courant ; retourne le nombre de propositions."""
+        rank, match_school, match_student = self.rank, self.match_school, self.match_student
+        proposals = 0
+
+        while free:
+            s = free.popleft()
+            prefs_s = self.prefs[s]
+
+            while self.next_choice[s] < len(prefs_s):
+                k = self.next_choice[s]
+                e = prefs_s[k]
+                self.next_choice[s] = k + 1
+                proposals += 1
+
+                current = match_school[e]
+                accepted = current == -1 or rank[e][s] < rank[e][current]
+                displaced = current if accepted else -1
+
+                event = ((self.clock,), s, e, k, accepted, displaced)
+                self.clock += 1
+                self.school_events[e].append(event)
+                self.student_events[s].append(event)
+
+                if accepted:
+                    match_school[e] = s
+                    match_student[s] = e
+                    if displaced != -1:
+                        match_student[displaced] = -1
+                        self.student_events[displaced].append(event)
+                        free.appendleft(displaced)
+                    break
+
+        return proposals
+
+    def _journal_holder(self, e, t, inclusive):
+        """Candidat retenu par e dans le journal juste avant t (ou juste après si inclusive)."""
+        events = self.school_events[e]
+        i = bisect_right(events, (t, _LAST)) if inclusive else bisect_left(events, (t,))
+        while i > 0:
+            i -= 1
+            if events[i][_ACCEPTED]:
+                return events[i][_STUDENT]
+        return -1
+
+    def _journal_next(self, s, t, inclusive):
+        """Prochain choix de s dans le journal juste avant t (ou juste après si inclusive)."""
+        events = self.student_events[s]
+        i = bisect_right(events, (t, _LAST)) if inclusive else bisect_left(events, (t,))
+        while i > 0:
+            i -= 1
+            if events[i][_STUDENT] == s:
+                return events[i][_POSITION] + 1
+        return 0
+
+    def _replay(self, s0, t0, next_choice, old_prefs=None):
+        """
+        Relit le journal à partir du temps t0, où l'étudiant s0 cesse de le
+        suivre : retiré (old_prefs=None), ou liste modifiée à partir de la
+        position next_choice (old_prefs = ancienne liste).
+
+        off        : étudiant désynchronisé -> [école tenue, prochain choix] réels,
+                     puis les mêmes d'après le journal
+        schools_off: école désynchronisée -> (candidat réel, candidat du journal)
+        Seuls les événements de ces agents sont relus. Les étudiants encore
+        libres à la fin reproposent avec _run().
+        """
+        rank, prefs, active = self.rank, self.prefs, self.active
+        self.passes += 1
+        tag = -self.passes
+
+        off, schools_off = {}, {}
+        changes = {}        # temps -> (événement du journal, événement réécrit ou None)
+        added = []          # propositions insérées pendant la relecture
+        heap, queued = [], set()
+        cost = {"visited": 0, "proposals": 0}
+
+        # s0 ne se resynchronise que si ses deux listes coïncident à partir de
+        # sa position (même suffixe) et qu'il a proposé aux mêmes écoles
+        if old_prefs is None:
+            tail = None
+        else:
+            new_prefs = prefs[s0]
+            tail = max(len(old_prefs), len(new_prefs))
+            if len(old_prefs) == len(new_prefs):
+                while tail > 0 and old_prefs[tail - 1] == new_prefs[tail - 1]:
+                    tail -= 1
+        diff = {}           # école -> propositions réelles - propositions du journal de s0
+
+        def count(e, delta):
+            n = diff.get(e, 0) + delta
+            if n:
+                diff[e] = n
+            else:
+                del diff[e]
+
+        def follow(events, t):
+            i = bisect_right(events, (t, _LAST))
+            if i < len(events) and events[i][_TIME] not in queued:
+                queued.add(events[i][_TIME])
+                heappush(heap, events[i])
+
+        def make_off(s, held, next_choice, t):
+            off[s] = [held, next_choice, held, next_choice]
+            follow(self.student_events[s], t)
+
+        def set_school(e, real, logged, t):
+            if real == logged:
+                schools_off.pop(e, None)
+            else:
+                if e not in schools_off:
+                    follow(self.school_events[e], t)
+                schools_off[e] = (real, logged)
+
+        def settle(s):
+            state = off.get(s)
+            if state is None or state[:2] != state[2:]:
+                return
+            if s == s0 and (tail is None or diff or state[1] < tail):
+                return
+            del off[s]
+
+        def waiting(s):
+            # libre en réalité mais apparié dans le journal : il propose aussitôt
+            state = off.get(s)
+            return state is not None and state[0] == -1 and state[2] != -1 \
+                and active[s] and state[1] < len(prefs[s])
+
+        def propose(s, key, t, inclusive):
+            """Proposition réelle de s, évaluée contre le candidat réel de l'école."""
+            state = off[s]
+            k = state[1]
+            e = prefs[s][k]
+            if e in schools_off:
+                real, logged = schools_off[e]
+            else:
+                real = logged = self._journal_holder(e, t, inclusive)
+            accepted = real == -1 or rank[e][s] < rank[e][real]
+
+            state[0], state[1] = (e if accepted else -1), k + 1
+            if s == s0:
+                count(e, 1)
+            if accepted:
+                if real != -1:
+                    if real not in off:
+                        make_off(real, e, self._journal_next(real, t, inclusive), t)
+                    off[real][0] = -1
+                set_school(e, s, logged, t)
+            cost["proposals"] += 1
+            return (key, s, e, k, accepted, real if accepted else -1)
+
+        off[s0] = [-1, next_choice, -1, next_choice]
+        events = self.student_events[s0]
+        i = bisect_left(events, (t0,))
+        queued.add(events[i][_TIME])
+        heappush(heap, events[i])
+
+        while heap:
+            event = heappop(heap)
+            t, x, e, k, accepted, displaced = event
+            cost["visited"] += 1
+            touched = [x, displaced]
+
+            if x in off:
+                # proposition du journal annulée ; x libre propose à sa place
+                state = off[x]
+                replacement = None
+                if state[0] == -1 and active[x] and state[1] < len(prefs[x]):
+                    replacement = propose(x, t, t, False)
+                    touched.append(replacement[_DISPLACED])
+                changes[t] = (event, replacement)
+                if x == s0:
+                    count(e, -1)
+
+                state[2], state[3] = (e if accepted else -1), k + 1
+                if accepted:
+                    if e in schools_off:
+                        real = schools_off[e][0]
+                    else:
+                        real = displaced  # école synchronisée : son candidat reste en place
+                        if real != -1 and real not in off:
+                            make_off(real, e, self._journal_next(real, t, False), t)
+                    if displaced != -1:
+                        off[displaced][2] = -1
+                    set_school(e, real, x, t)
+
+            elif e in schools_off or (accepted and displaced in off):
+                # x suit le journal : son issue est recalculée contre le candidat réel
+                real, logged = schools_off.get(e, (displaced, displaced))
+                now_accepted = real == -1 or rank[e][x] < rank[e][real]
+                if now_accepted and real != -1:
+                    off[real][0] = -1
+                if accepted and displaced != -1:
+                    off[displaced][2] = -1
+                if now_accepted != accepted:
+                    make_off(x, -1, k, t)
+                    off[x] = [e if now_accepted else -1, k + 1, e if accepted else -1, k + 1]
+                set_school(e, x if now_accepted else real, x if accepted else logged, t)
+                touched.append(real)
+
+                rewritten = (t, x, e, k, now_accepted, real if now_accepted else -1)
+                if rewritten != event:
+                    changes[t] = (event, rewritten)
+
+            for s in touched:
+                settle(s)
+                if s in off:
+                    follow(self.student_events[s], t)
+            if e in schools_off:
+                follow(self.school_events[e], t)
+
+            # étudiants libérés qu'aucune proposition du journal ne remplacera
+            stack = deque(s for s in touched if waiting(s))
+            n_inserted = 0
+            while stack:
+                s = stack.popleft()
+                while waiting(s):
+                    n_inserted += 1
+                    inserted = propose(s, t + (tag, n_inserted), t, True)
+                    added.append(inserted)
+                    settle(s)
+                    r = inserted[_DISPLACED]
+                    if r != -1:
+                        settle(r)
+                        if waiting(r):
+                            stack.appendleft(r)
+
+        for old, new in changes.values():
+            self._remove_event(old)
+            if new is not None:
+                self._insert_event(new)
+        for event in added:
+            self._insert_event(event)
+
+        for e, (real, _) in schools_off.items():
+            self.match_school[e] = real
+        free = deque()
+        for s, (held, next_choice, _, _) in off.items():
+            self.match_student[s] = held
+            self.next_choice[s] = next_choice
+            if held == -1 and active[s]:
+                free.append(s)
+
+        self.last_cost = {"visited": cost["visited"], "invalidated": len(changes),
+                          "proposals": cost["proposals"] + self._run(free)}
+
+    def _event_lists(self, event):
+        lists = [self.school_events[event[_SCHOOL]], self.student_events[event[_STUDENT]]]
+        if event[_DISPLACED] != -1:
+            lists.append(self.student_events[event[_DISPLACED]])
+        return lists
+
+    def _remove_event(self, event):
+        for events in self._event_lists(event):
+            del events[bisect_left(events, (event[_TIME],))]
+
+    def _insert_event(self, event):
+        for events in self._event_lists(event):
+            insort(events, event)
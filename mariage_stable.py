@@ -2,6 +2,8 @@ import random, csv
 
 import csv
 
+from tracing import active_tracer
+
 def read_instance(filename="instance.csv"):
     """
     Lit un fichier CSV généré par generate_instance.py
@@ -19,7 +21,7 @@ def read_instance(filename="instance.csv"):
         for row in reader:
             if not row or len(row) < 3:
                 continue  # ignorer lignes vides
-            entity_type, name, preferences = row
+            entity_type, name, preferences = row[:3]  # colonnes suivantes (ex. Capacité) ignorées
             prefs_list = [p.strip() for p in preferences.split("-")]
 
             if entity_type == "Etudiant":
@@ -30,15 +32,16 @@ def read_instance(filename="instance.csv"):
     return prefs_students, prefs_schools
 
 
-def mariage_stable(pref_student, pref_school):
+def mariage_stable(pref_student, pref_school, tracer=None):
+    """
+    tracer : Tracer optionnel (tracing.py) qui compte les propositions, refus
+    et évictions, voire journalise chaque proposition ; rien n'est affiché.
+    """
 
     free_students = list(pref_student.keys())#all students are free at the start
     proposals = {p: [] for p in pref_student} #track proposals made
     engaged = {s: None for s in pref_school} #track current engagements
-
-    print("\n free student:", free_students)
-    print("\n proposals:", proposals)
-    print("\n engaged:", engaged)
+    tracer = active_tracer(tracer)
 
 
     while free_students:
@@ -54,23 +57,32 @@ def mariage_stable(pref_student, pref_school):
         if next_school is None:
             # l'étudiant a proposé à toutes les écoles : on le retire
             free_students.pop(0)
+            continue
 
         proposals[current_student].append(next_school)
 
+        if current_student not in pref_school.get(next_school, []):
+            if tracer:
+                tracer.proposal(current_student, next_school, False)
+            continue  # école inconnue ou qui ne classe pas l'étudiant : refus
+
         current_eng = engaged[next_school]
 
         if current_eng is None:
             engaged[next_school] = current_student #si l'école n'a pas d'engagement elle le prend temporairement
             free_students.pop(0)
+            if tracer:
+                tracer.proposal(current_student, next_school, True)
         else:
             if pref_school[next_school].index(current_student) < pref_school[next_school].index(current_eng): #sinon, on les compares dans le classement de l'école
                 engaged[next_school] = current_student #on affecte le nouveau si il est mieux classé que l'ancien
                 free_students.pop(0)
                 free_students.append(current_eng) #l'ancien candidat devient alors libre
-            else:
-                pass
+                if tracer:
+                    tracer.proposal(current_student, next_school, True, current_eng)
+            elif tracer:
+                tracer.proposal(current_student, next_school, False)
 
-    print("engaged fin:", engaged)
     return engaged
 
 
@@ -86,7 +98,14 @@ if __name__ == "__main__":
     for e, prefs in prefs_schools.items():
         print(f"  {e}: {prefs}")
 
+    from tracing import Tracer
+
+    tracer = Tracer("counters")
+    mar_stable = mariage_stable(prefs_students, prefs_schools, tracer=tracer)
+
     print("\n résultat du mariage stable :")
-    mar_stable = mariage_stable(prefs_students, prefs_schools)
+    for e, s in mar_stable.items():
+        print(f"  {e} <- {s}")
+    print("\n compteurs :", tracer.counters)
 
     
\ No newline at end of file
@@ -1,5 +1,7 @@
 import csv
 
+from tracing import active_tracer
+
 
 # =====================================================================
 # 1) Lecture du fichier d'instance
@@ -23,7 +25,7 @@ def read_instance(filename="instance_vrais_noms.csv"):
             if not row or len(row) < 3:
                 continue
 
-            entity_type, name, preferences = row
+            entity_type, name, preferences = row[:3]  # colonnes suivantes (ex. Capacité) ignorées
             prefs_list = [p.strip() for p in preferences.split(" - ")]
 
             if entity_type == "Etudiant":
@@ -39,15 +41,16 @@ def read_instance(filename="instance_vrais_noms.csv"):
 # 2) Algorithme du mariage stable (Gale–Shapley)
 # =====================================================================
 
-def mariage_stable(pref_student, pref_school):
+def mariage_stable(pref_student, pref_school, tracer=None):
+    """
+    tracer : Tracer optionnel (tracing.py) qui compte les propositions, refus
+    et évictions, voire journalise chaque proposition ; rien n'est affiché.
+    """
 
     free_students = list(pref_student.keys())#all students are free at the start
     proposals = {p: [] for p in pref_student} #track proposals made
     engaged = {s: None for s in pref_school} #track current engagements
-
-    print("\n free student:", free_students)
-    print("\n proposals:", proposals)
-    print("\n engaged:", engaged)
+    tracer = active_tracer(tracer)
 
 
     while free_students:
@@ -63,23 +66,32 @@ def mariage_stable(pref_student, pref_school):
         if next_school is None:
             # l'étudiant a proposé à toutes les écoles : on le retire
             free_students.pop(0)
+            continue
 
         proposals[current_student].append(next_school)
 
+        if current_student not in pref_school.get(next_school, []):
+            if tracer:
+                tracer.proposal(current_student, next_school, False)
+            continue  # école inconnue ou qui ne classe pas l'étudiant : refus
+
         current_eng = engaged[next_school]
 
         if current_eng is None:
             engaged[next_school] = current_student #si l'école n'a pas d'engagement elle le prend temporairement
             free_students.pop(0)
+            if tracer:
+                tracer.proposal(current_student, next_school, True)
         else:
             if pref_school[next_school].index(current_student) < pref_school[next_school].index(current_eng): #sinon, on les compares dans le classement de l'école
                 engaged[next_school] = current_student #on affecte le nouveau si il est mieux classé que l'ancien
                 free_students.pop(0)
                 free_students.append(current_eng) #l'ancien candidat devient alors libre
-            else:
-                pass
+                if tracer:
+                    tracer.proposal(current_student, next_school, True, current_eng)
+            elif tracer:
+                tracer.proposal(current_student, next_school, False)
 
-    print("engaged fin:", engaged)
     return engaged
 
 
@@ -91,22 +103,25 @@ def compute_ranks(prefs_students, prefs_schools, engaged):
     """
     ranks_students[s] = rang de l'école obtenue par s
     ranks_schools[e]  = rang de l'étudiant obtenu par e
+    Les agents non appariés (listes incomplètes) n'ont pas de rang.
     """
     ranks_students = {}
     ranks_schools = {}
 
     # Matching étudiant -> école
-    match_student = {stud: sch for sch, stud in engaged.items()}
+    match_student = {stud: sch for sch, stud in engaged.items() if stud is not None}
 
     # rangs étudiants
     for s, prefs in prefs_students.items():
-        e = match_student[s]
-        ranks_students[s] = prefs.index(e)
+        e = match_student.get(s)
+        if e is not None:
+            ranks_students[s] = prefs.index(e)
 
     # rangs écoles
     for e, prefs in prefs_schools.items():
-        s = engaged[e]
-        ranks_schools[e] = prefs.index(s)
+        s = engaged.get(e)
+        if s is not None:
+            ranks_schools[e] = prefs.index(s)
 
     return ranks_students, ranks_schools
 
@@ -161,19 +176,25 @@ def is_pareto_optimal(prefs_students, prefs_schools, engaged):
     pour les étudiants, mais pas forcément pour les écoles.
     On teste l'existence d'une paire améliorante (blocking-improving pair).
     """
-    match_student = {stud: sch for sch, stud in engaged.items()}
+    match_student = {stud: sch for sch, stud in engaged.items() if stud is not None}
 
     for e, prefE in prefs_schools.items():
-        current_s = engaged[e]
+        current_s = engaged.get(e)
 
         # parcourir les étudiants mieux classés que current_s
+        # (tous si l'école est libre)
         for s in prefE:
             if s == current_s:
                 break  # ensuite, ce sont moins préférés
 
-            # vérifier si s préfère cette école à son match actuel
-            current_e_for_s = match_student[s]
-            if prefs_students[s].index(e) < prefs_students[s].index(current_e_for_s):
+            try:
+                rank_e = prefs_students[s].index(e)
+            except (KeyError, ValueError):
+                continue  # s ne classe pas e (liste incomplète)
+
+            # vérifier si s préfère cette école à son match actuel (ou est libre)
+            current_e_for_s = match_student.get(s)
+            if current_e_for_s is None or rank_e < prefs_students[s].index(current_e_for_s):
                 # amélioration bilatérale
                 return False
 
@@ -194,7 +215,9 @@ def compute_all_measures(prefs_students, prefs_schools, engaged):
         "avg_rank_schools": mean_rank(ranks_schools),
         "egalitarian_cost": egalitarian_cost(ranks_students, ranks_schools),
         "welfare": compute_welfare(ranks_students, ranks_schools, n),
-        "pareto_optimal": is_pareto_optimal(prefs_students, prefs_schools, engaged)
+        "pareto_optimal": is_pareto_optimal(prefs_students, prefs_schools, engaged),
+        "unmatched_students": len(prefs_students) - len(ranks_students),
+        "unmatched_schools": len(prefs_schools) - len(ranks_schools)
     }
 
 
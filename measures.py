@@ -0,0 +1,323 @@
+import math
+
+import numpy as np
+
+from gale_shapley import index_instance, solve_both, to_engaged
+
+
+# =====================================================================
+# Mesures sur tableaux de rangs (NumPy)
+# =====================================================================
+#
+# Toutes les fonctions prennent une IndexedInstance (gale_shapley.py) et
+# match_school (école -> étudiant, -1 si libre). Les tables de rangs déjà
+# construites par le moteur sont réutilisées telles quelles (vues sans copie).
+
+BLOCK_ROWS = 1024  # lignes traitées à la fois pour borner la mémoire en O(BLOCK_ROWS * n)
+
+
+def rank_matrices(instance):
+    """Vues NumPy (sans copie) des tables rank_students et rank_schools."""
+    rank_students = np.frombuffer(instance.rank_students, dtype=np.intc).reshape(
+        instance.n_students, instance.n_schools)
+    rank_schools = np.frombuffer(instance.rank_schools, dtype=np.intc).reshape(
+        instance.n_schools, instance.n_students)
+    return rank_students, rank_schools
+
+
+def match_students(match_school, n_students):
+    """Inverse match_school : étudiant -> école (-1 si libre)."""
+    match_school = np.asarray(match_school, dtype=np.intp)
+    match_student = np.full(n_students, -1, dtype=np.intp)
+    schools = np.nonzero(match_school != -1)[0]
+    match_student[match_school[schools]] = schools
+    return match_student
+
+
+def compute_rank_arrays(instance, match_school):
+    """
+    ranks_students[s] = rang de l'école obtenue par s
+    ranks_schools[e]  = rang de l'étudiant obtenu par e
+    (int32, -1 pour un agent non apparié)
+    """
+    rank_students, rank_schools = rank_matrices(instance)
+    match_school = np.asarray(match_school, dtype=np.intp)
+    match_student = match_students(match_school, instance.n_students)
+
+    ranks_students = np.full(instance.n_students, -1, dtype=np.int32)
+    s = np.nonzero(match_student != -1)[0]
+    ranks_students[s] = rank_students[s, match_student[s]]
+
+    ranks_schools = np.full(instance.n_schools, -1, dtype=np.int32)
+    e = np.nonzero(match_school != -1)[0]
+    ranks_schools[e] = rank_schools[e, match_school[e]]
+
+    return ranks_students, ranks_schools
+
+
+# =====================================================================
+# Distribution des rangs (vecteurs int32, un ou k matchings)
+# =====================================================================
+#
+# Tout est déduit d'un histogramme des rangs par côté (un seul bincount) :
+# sommes, moyennes, pire rang, percentiles et Gini coûtent O(n) au lieu d'un
+# tri. Les entrées sont de forme (n,) ou (k, n) avec -1 pour un agent libre.
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def rank_histograms(ranks, n_ranks):
+    """
+    hist[..., r] = nombre d'agents appariés à leur choix de rang r.
+    ranks : (n,) ou (k, n) ; résultat (n_ranks,) ou (k, n_ranks).
+    """
+    ranks = np.asarray(ranks)
+    batch = np.atleast_2d(ranks)
+    k = batch.shape[0]
+    matched = batch != -1
+    rows = np.broadcast_to(np.arange(k)[:, None], batch.shape)[matched]
+    hist = np.bincount(rows * n_ranks + batch[matched], minlength=k * n_ranks).reshape(k, n_ranks)
+    return hist if ranks.ndim == 2 else hist[0]
+
+
+def _hist_percentiles(hist, q):
+    """Percentiles (interpolation linéaire, comme np.percentile) lus sur des histogrammes (k, B)."""
+    k, n_bins = hist.shape
+    counts = hist.sum(axis=1)
+    cum = hist.cumsum(axis=1)
+
+    # une seule recherche dichotomique : chaque ligne décalée au-delà de la précédente
+    offsets = np.arange(k) * (int(counts.max(initial=0)) + 1)
+    flat_cum = (cum + offsets[:, None]).ravel()
+
+    def value_at(position):
+        found = np.searchsorted(flat_cum, (position + offsets[:, None]).ravel(), side="right")
+        return found.reshape(position.shape) - np.arange(k)[:, None] * n_bins
+
+    position = np.maximum(counts - 1, 0)[:, None] * (np.asarray(q, dtype=float) / 100)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    values = value_at(low) + (value_at(high) - value_at(low)) * (position - low)
+    return np.where(counts[:, None] > 0, values, np.nan)
+
+
+def _hist_gini(hist):
+    """Coefficient de Gini des rangs de chaque ligne (0 = égalité parfaite)."""
+    values = np.arange(hist.shape[1], dtype=float)
+    counts = hist.sum(axis=1).astype(float)
+    cum = hist.cumsum(axis=1).astype(float)
+    total = hist @ values
+
+    # somme des positions triées (1..n) occupées par chaque valeur de rang
+    positions = hist * (2 * cum - hist + 1) / 2
+    weighted = positions @ values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gini = 2 * weighted / (counts * total) - (counts + 1) / counts
+    return np.where(total > 0, gini, np.where(counts > 0, 0.0, np.nan))
+
+
+def rank_summary(ranks_students, ranks_schools, percentiles=PERCENTILES):
+    """
+    Agrégats et distribution des rangs d'un matching (vecteurs (n,)) ou de
+    k matchings (matrices (k, n), cf. rank_arrays_batch de gale_shapley_numpy) :
+
+      - avg_rank_*, egalitarian_cost, welfare, unmatched_* : comme compute_measures()
+      - sex_equality_cost : |somme des rangs étudiants - somme des rangs écoles|
+      - worst_rank_*, regret_cost : pire rang obtenu par côté, et des deux côtés (minimax)
+      - percentiles_* : rangs aux percentiles demandés
+      - gini_* : coefficient de Gini des rangs
+      - hist_students[r], hist_schools[r] : nombre d'agents appariés à leur choix de rang r
+
+    Valeurs scalaires pour un matching, tableaux de longueur k en mode batch.
+    """
+    ranks_students = np.asarray(ranks_students)
+    ranks_schools = np.asarray(ranks_schools)
+    n_students, n_schools = ranks_students.shape[-1], ranks_schools.shape[-1]
+
+    hist_students = np.atleast_2d(rank_histograms(ranks_students, n_schools))
+    hist_schools = np.atleast_2d(rank_histograms(ranks_schools, n_students))
+
+    matched_students = hist_students.sum(axis=1)
+    matched_schools = hist_schools.sum(axis=1)
+    sum_students = hist_students @ np.arange(n_schools, dtype=np.int64)
+    sum_schools = hist_schools @ np.arange(n_students, dtype=np.int64)
+
+    def worst(hist):
+        # dernier rang non vide, -1 si personne n'est apparié
+        return np.where(hist.any(axis=1), hist.shape[1] - 1 - np.argmax(hist[:, ::-1] > 0, axis=1), -1)
+
+    worst_students, worst_schools = worst(hist_students), worst(hist_schools)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_students = sum_students / matched_students
+        avg_schools = sum_schools / matched_schools
+
+    summary = {
+        "avg_rank_students": avg_students,
+        "avg_rank_schools": avg_schools,
+        "egalitarian_cost": sum_students + sum_schools,
+        "welfare": (matched_students + matched_schools) - (sum_students + sum_schools) / (n_schools - 1),
+        "unmatched_students": n_students - matched_students,
+        "unmatched_schools": n_schools - matched_schools,
+        "sex_equality_cost": np.abs(sum_students - sum_schools),
+        "worst_rank_students": worst_students,
+        "worst_rank_schools": worst_schools,
+        "regret_cost": np.maximum(worst_students, worst_schools),
+        "percentiles_students": _hist_percentiles(hist_students, percentiles),
+        "percentiles_schools": _hist_percentiles(hist_schools, percentiles),
+        "gini_students": _hist_gini(hist_students),
+        "gini_schools": _hist_gini(hist_schools),
+        "hist_students": hist_students,
+        "hist_schools": hist_schools,
+    }
+
+    if ranks_students.ndim == 2:
+        return summary
+    # un seul matching : scalaires Python, tableaux 1-D
+    return {key: value[0].item() if value.ndim == 1 else value[0] for key, value in summary.items()}
+
+
+# =====================================================================
+# Stabilité : recherche vectorisée des paires bloquantes
+# =====================================================================
+
+def iter_blocking_pairs(instance, match_school):
+    """
+    Produit les paires bloquantes (s, e) en identifiants : s préfère e à son
+    école actuelle et e préfère s à son étudiant actuel (un agent libre
+    préfère n'importe quel partenaire). Coût O(n²), par blocs de lignes.
+    """
+    rank_students, rank_schools = rank_matrices(instance)
+    ranks_students, ranks_schools = compute_rank_arrays(instance, match_school)
+
+    # libre = pire que tout le monde
+    current_students = np.where(ranks_students == -1, instance.n_schools, ranks_students)
+    current_schools = np.where(ranks_schools == -1, instance.n_students, ranks_schools)
+
+    for start in range(0, instance.n_students, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, instance.n_students)
+        student_prefers = rank_students[start:stop] < current_students[start:stop, None]
+        school_prefers = rank_schools[:, start:stop].T < current_schools[None, :]
+        for s, e in zip(*np.nonzero(student_prefers & school_prefers)):
+            yield start + int(s), int(e)
+
+
+def blocking_pairs(instance, match_school):
+    """Liste de toutes les paires bloquantes, en noms (étudiant, école)."""
+    return [
+        (instance.students[s], instance.schools[e])
+        for s, e in iter_blocking_pairs(instance, match_school)
+    ]
+
+
+def is_stable(instance, match_school):
+    """Vérifie la stabilité ; retourne (stable, liste des paires bloquantes)."""
+    pairs = blocking_pairs(instance, match_school)
+    return not pairs, pairs
+
+
+def is_pareto_optimal(instance, match_school):
+    """
+    Même critère que is_pareto_optimal() de mariage_stable_mesure : absence de
+    paire étudiant/école qui s'améliorerait des deux côtés.
+    """
+    return next(iter_blocking_pairs(instance, match_school), None) is None
+
+
+# =====================================================================
+# Fonction globale regroupant toutes les mesures
+# =====================================================================
+
+def compute_measures(instance, match_school):
+    """Mêmes clés et valeurs que compute_all_measures(), calculées sur les rangs."""
+    summary = rank_summary(*compute_rank_arrays(instance, match_school))
+
+    return {
+        "avg_rank_students": summary["avg_rank_students"],
+        "avg_rank_schools": summary["avg_rank_schools"],
+        "egalitarian_cost": summary["egalitarian_cost"],
+        "welfare": summary["welfare"],
+        "pareto_optimal": is_pareto_optimal(instance, match_school),
+        "unmatched_students": summary["unmatched_students"],
+        "unmatched_schools": summary["unmatched_schools"],
+    }
+
+
+def compute_distribution_measures(instance, match_school, percentiles=PERCENTILES):
+    """rank_summary() d'un matching de l'instance (histogrammes, percentiles, regret, Gini...)."""
+    return rank_summary(*compute_rank_arrays(instance, match_school), percentiles)
+
+
+MEASURE_NAMES = (
+    "avg_rank_students", "avg_rank_schools", "egalitarian_cost", "welfare",
+    "unmatched_students", "unmatched_schools", "sex_equality_cost",
+    "worst_rank_students", "worst_rank_schools", "regret_cost",
+    "percentiles_students", "percentiles_schools", "gini_students", "gini_schools",
+    "hist_students", "hist_schools", "pareto_optimal",
+)
+DEFAULT_MEASURES = ("avg_rank_students", "avg_rank_schools", "egalitarian_cost", "welfare")
+
+
+def select_measures(instance, match_school, names=DEFAULT_MEASURES, percentiles=PERCENTILES):
+    """
+    Uniquement les mesures demandées (noms de MEASURE_NAMES) : rank_summary()
+    n'est calculé que si l'une d'elles en dépend, et la recherche des paires
+    bloquantes (O(n²)) seulement pour pareto_optimal. Les tableaux sont
+    convertis en listes (sérialisables en JSON).
+    """
+    unknown = [name for name in names if name not in MEASURE_NAMES]
+    if unknown:
+        raise ValueError(f"Mesures inconnues : {', '.join(unknown)}")
+
+    summary = None
+    if any(name != "pareto_optimal" for name in names):
+        summary = compute_distribution_measures(instance, match_school, percentiles)
+
+    selected = {}
+    for name in names:
+        if name == "pareto_optimal":
+            selected[name] = is_pareto_optimal(instance, match_school)
+        else:
+            value = summary[name]
+            selected[name] = value.tolist() if isinstance(value, np.ndarray) else value
+    return selected
+
+
+def json_measure(value):
+    """Valeur de mesure sérialisable en JSON strict : NaN et infinis -> None (null)."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, list):
+        return [json_measure(v) for v in value]
+    return value
+
+
+def compute_all_measures_fast(prefs_students, prefs_schools, engaged):
+    """Équivalent de compute_all_measures() à partir des dictionnaires de noms."""
+    instance = index_instance(prefs_students, prefs_schools)
+    student_ids = instance.student_ids
+    match_school = [
+        student_ids[engaged[e]] if engaged.get(e) is not None else -1
+        for e in instance.schools
+    ]
+    return compute_measures(instance, match_school)
+
+
+def compute_measures_both(instance, parallel=None):
+    """
+    Matchings étudiant-optimal et école-optimal (solve_both) et leurs mesures,
+    à partir d'un seul encodage de l'instance :
+    {"students": (match_school, mesures), "schools": (match_school, mesures)}.
+    """
+    return {
+        side: (match_school, compute_measures(instance, match_school))
+        for side, match_school in solve_both(instance, parallel).items()
+    }
+
+
+def mariage_stable_both(prefs_students, prefs_schools, parallel=None):
+    """Version en noms : {côté: (engaged, mesures)} pour les deux côtés proposants."""
+    instance = index_instance(prefs_students, prefs_schools)
+    return {
+        side: (to_engaged(instance, match_school), measures)
+        for side, (match_school, measures) in compute_measures_both(instance, parallel).items()
+    }
@@ -0,0 +1,147 @@
+import numpy as np
+
+
+# =====================================================================
+# Modèles de préférences corrélées (vectorisés)
+# =====================================================================
+#
+# Chaque générateur renvoie une matrice (n_agents, n_items) d'identifiants :
+# ligne i = classement des items par l'agent i, du préféré au moins aimé.
+# Les deux côtés d'une instance sont générés indépendamment
+# (voir generate_preferences_ids dans generate_preference.py).
+
+def uniform_preferences(n_agents, n_items, rng):
+    """Permutations uniformes indépendantes (cas le plus facile pour Gale–Shapley)."""
+    # permuted() copie la vue diffusée : une seule matrice int32 est allouée
+    return rng.permuted(np.broadcast_to(np.arange(n_items, dtype=np.int32), (n_agents, n_items)), axis=1)
+
+
+def master_list_preferences(n_agents, n_items, rng, correlation=0.8):
+    """
+    Liste maîtresse : chaque item a une qualité commune, chaque agent la perçoit
+    avec un bruit individuel. score = correlation * qualité + (1 - correlation) * bruit.
+    correlation = 0 : uniforme ; correlation = 1 : tout le monde a la même liste.
+    """
+    quality = rng.random(n_items)
+    noise = rng.random((n_agents, n_items))
+    scores = correlation * quality[None, :] + (1.0 - correlation) * noise
+    return np.argsort(-scores, axis=1, kind="stable").astype(np.int32)
+
+
+def _truncated_geometric(rng, phi, sizes):
+    """Tirage de d dans {0, ..., size - 1} avec P(d) proportionnel à phi**d."""
+    u = rng.random(sizes.shape)
+    if phi <= 0.0:
+        return np.zeros(sizes.shape, dtype=np.intp)
+    if phi >= 1.0:
+        return np.minimum((u * sizes).astype(np.intp), sizes - 1)
+    d = np.floor(np.log1p(-u * (1.0 - phi ** sizes)) / np.log(phi)).astype(np.intp)
+    return np.minimum(d, sizes - 1)
+
+
+def mallows_preferences(n_agents, n_items, rng, phi=0.5, reference=None):
+    """
+    Modèle de Mallows autour d'un classement de référence (tiré au hasard si
+    absent). phi = 0 : tous identiques à la référence ; phi = 1 : uniforme.
+
+    Tirage exact par code de Lehmer : à la position i, on prend le d-ième item
+    encore disponible de la référence, d suivant une loi géométrique tronquée.
+    La recherche du d-ième disponible se fait sur un arbre de Fenwick par agent,
+    vectorisé sur tous les agents : O(n_agents * n_items * log n_items).
+    """
+    if reference is None:
+        reference = rng.permutation(n_items)
+    reference = np.asarray(reference, dtype=np.int32)
+
+    rows = np.arange(n_agents)
+    # arbre de Fenwick (indices 1..n) comptant les items disponibles
+    tree = np.zeros((n_agents, n_items + 1), dtype=np.int32)
+    idx = np.arange(1, n_items + 1)
+    tree[:, 1:] = (idx & -idx)[None, :]
+
+    top_step = 1 << (n_items.bit_length() - 1) if n_items else 0
+    prefs = np.empty((n_agents, n_items), dtype=np.int32)
+
+    for i in range(n_items):
+        d = _truncated_geometric(rng, phi, np.full(n_agents, n_items - i))
+
+        # recherche du (d+1)-ième disponible
+        pos = np.zeros(n_agents, dtype=np.intp)
+        remaining = d + 1
+        step = top_step
+        while step:
+            nxt = pos + step
+            ok = nxt <= n_items
+            counts = tree[rows, np.minimum(nxt, n_items)]
+            go = ok & (counts < remaining)
+            pos = np.where(go, nxt, pos)
+            remaining = np.where(go, remaining - counts, remaining)
+            step >>= 1
+
+        prefs[:, i] = reference[pos]
+
+        # retrait de l'item choisi (position pos + 1 dans l'arbre)
+        node = pos + 1
+        active = node <= n_items
+        while active.any():
+            tree[rows[active], node[active]] -= 1
+            node = node + (node & -node)
+            active = node <= n_items
+
+    return prefs
+
+
+def euclidean_preferences(n_agents, n_items, rng, dim=2, noise=0.1,
+                          agent_points=None, item_points=None):
+    """
+    Préférences spatiales : agents et items sont des points de [0, 1]^dim,
+    chaque agent classe les items par distance croissante plus un bruit
+    individuel d'écart-type `noise` (noise = 0 : purement géographique).
+    Les points peuvent être fournis pour générer les deux côtés d'une même carte.
+    """
+    if agent_points is None:
+        agent_points = rng.random((n_agents, dim))
+    if item_points is None:
+        item_points = rng.random((n_items, dim))
+
+    # |a - b|² = |a|² + |b|² - 2 a.b : une seule matrice (n_agents, n_items) en mémoire
+    squared = (agent_points ** 2).sum(axis=1)[:, None] + (item_points ** 2).sum(axis=1)[None, :] \
+        - 2.0 * agent_points @ item_points.T
+    distances = np.sqrt(np.maximum(squared, 0.0))
+    if noise:
+        distances = distances + noise * rng.standard_normal((n_agents, n_items))
+    return np.argsort(distances, axis=1, kind="stable").astype(np.int32)
+
+
+MODELS = {
+    "uniform": uniform_preferences,
+    "master": master_list_preferences,
+    "mallows": mallows_preferences,
+    "euclidean": euclidean_preferences,
+}
+
+
+def generate_model_matrices(model, n_students, n_schools, seed=None, **params):
+    """
+    Génère les deux matrices d'une instance avec le modèle demandé.
+    Pour "euclidean", étudiants et écoles partagent la même carte.
+    """
+    rng = np.random.default_rng(seed)
+
+    if model == "euclidean":
+        dim = params.get("dim", 2)
+        student_points = rng.random((n_students, dim))
+        school_points = rng.random((n_schools, dim))
+        prefs_students = euclidean_preferences(n_students, n_schools, rng,
+                                               agent_points=student_points,
+                                               item_points=school_points, **params)
+        prefs_schools = euclidean_preferences(n_schools, n_students, rng,
+                                              agent_points=school_points,
+                                              item_points=student_points, **params)
+        return prefs_students, prefs_schools
+
+    if model not in MODELS:
+        raise ValueError(f"Modèle inconnu : {model} (choix : {', '.join(MODELS)})")
+
+    generator = MODELS[model]
+    return generator(n_students, n_schools, rng, **params), generator(n_schools, n_students, rng, **params)
@@ -0,0 +1,143 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+
+# =====================================================================
+# Stockage colonnaire des mesures du benchmark (Parquet)
+# =====================================================================
+#
+# Un fichier <run_id>.parquet par exécution du benchmark, une ligne par
+# instance et par côté proposant :
+#   run_id, instance, seed, n_students, n_schools, generator, side,
+#   avg_rank_students, avg_rank_schools, welfare, egalitarian_cost,
+#   pareto_optimal, solve_time (s), cached
+#
+# Les fichiers sont lus ensemble comme un seul jeu de données pyarrow :
+# seules les colonnes demandées sont lues, et les filtres sont appliqués
+# pendant la lecture. pyarrow n'est importé qu'à l'usage (pip install pyarrow).
+
+RESULTS_DIR = "results_store"
+
+MEASURE_COLUMNS = ["avg_rank_students", "avg_rank_schools", "welfare", "egalitarian_cost"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Le stockage des résultats nécessite pyarrow : pip install pyarrow") from exc
+    return pa, ds, pq
+
+
+def _schema(pa):
+    return pa.schema([
+        ("run_id", pa.string()),
+        ("instance", pa.int32()),
+        ("seed", pa.int64()),
+        ("n_students", pa.int32()),
+        ("n_schools", pa.int32()),
+        ("generator", pa.string()),
+        ("side", pa.string()),
+        ("avg_rank_students", pa.float64()),
+        ("avg_rank_schools", pa.float64()),
+        ("welfare", pa.float64()),
+        ("egalitarian_cost", pa.int64()),
+        ("pareto_optimal", pa.bool_()),
+        ("solve_time", pa.float64()),
+        ("cached", pa.bool_()),
+    ])
+
+
+def new_run_id():
+    """Identifiant d'exécution triable par date : 20240101T120000-1a2b3c4d."""
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def result_records(results, generator=None, run_id=None):
+    """
+    Lignes (dictionnaires) à partir des résultats de run_instances()
+    (InstanceResult) : deux lignes par instance, une par côté proposant.
+    """
+    records = []
+    for i, r in enumerate(results):
+        for side, m in (("students", r.measures), ("schools", r.measures_schools)):
+            solve_time, cached = r.timings[side]
+            records.append({
+                "run_id": run_id, "instance": i, "seed": r.seed,
+                "n_students": r.n_students, "n_schools": r.n_schools,
+                "generator": generator or "real_names", "side": side,
+                "avg_rank_students": m["avg_rank_students"], "avg_rank_schools": m["avg_rank_schools"],
+                "welfare": m["welfare"], "egalitarian_cost": m["egalitarian_cost"],
+                "pareto_optimal": m["pareto_optimal"],
+                "solve_time": solve_time, "cached": cached,
+            })
+    return records
+
+
+def write_run(results, generator=None, directory=RESULTS_DIR, run_id=None):
+    """
+    Écrit les mesures d'une exécution du benchmark dans un nouveau fichier
+    Parquet du magasin ; retourne son run_id. Les exécutions précédentes ne
+    sont jamais réécrites.
+    """
+    pa, _, pq = _pyarrow()
+    run_id = run_id or new_run_id()
+    table = pa.Table.from_pylist(result_records(results, generator, run_id), schema=_schema(pa))
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{run_id}.parquet")
+    # écriture atomique : une lecture concurrente ne voit jamais un fichier partiel
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return run_id
+
+
+def list_runs(directory=RESULTS_DIR):
+    """run_id des exécutions enregistrées, de la plus récente à la plus ancienne."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted((name[:-len(".parquet")] for name in os.listdir(directory) if name.endswith(".parquet")),
+                  reverse=True)
+
+
+def scan(directory=RESULTS_DIR, columns=None, **equals):
+    """
+    Table pyarrow des lignes du magasin, limitée à `columns` et aux lignes
+    dont les colonnes valent `equals` (ex. scan(side="students", n_students=100)).
+    """
+    pa, ds, _ = _pyarrow()
+    runs = list_runs(directory)
+    if not runs:
+        return _schema(pa).empty_table().select(columns or _schema(pa).names)
+
+    condition = None
+    for name, value in equals.items():
+        term = ds.field(name) == value
+        condition = term if condition is None else condition & term
+
+    # liste explicite : les fichiers .tmp en cours d'écriture sont ignorés
+    paths = [os.path.join(directory, f"{run_id}.parquet") for run_id in runs]
+    dataset = ds.dataset(paths, format="parquet", schema=_schema(pa))
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def load_results(directory=RESULTS_DIR, columns=None, **equals):
+    """Comme scan(), en DataFrame pandas."""
+    return scan(directory, columns, **equals).to_pandas()
+
+
+def aggregate(directory=RESULTS_DIR, by=("generator", "n_students", "side"), columns=None, **equals):
+    """
+    Moyenne, minimum et maximum de chaque mesure par groupe `by`, calculés
+    par pyarrow sans matérialiser les lignes en Python. DataFrame pandas.
+    """
+    columns = list(columns or MEASURE_COLUMNS)
+    table = scan(directory, list(by) + columns, **equals)
+    aggregations = [(c, f) for c in columns for f in ("mean", "min", "max")] + [(columns[0], "count")]
+    result = table.group_by(list(by)).aggregate(aggregations)
+    result = result.to_pandas().rename(columns={f"{columns[0]}_count": "count"})
+    return result.sort_values(list(by)).reset_index(drop=True)
@@ -0,0 +1,93 @@
+from array import array
+
+from tracing import ACCEPTED, REJECTED
+
+
+# =====================================================================
+# Historique compact d'une simulation pas à pas
+# =====================================================================
+#
+# Au lieu de garder un tableau des engagements par étape (O(étapes x n)),
+# on garde le journal des propositions dans des tableaux d'entiers et une
+# copie des engagements toutes les `interval` étapes (points de reprise).
+# L'état à l'étape k est reconstruit depuis le point de reprise précédent.
+
+class SimulationHistory:
+    """
+    Journal des événements (étudiant, école, issue, évincé) produits par
+    iter_proposals() (gale_shapley.py), en identifiants.
+
+      - len(history)        : nombre d'étapes (propositions)
+      - history.event(k)    : k-ième événement (k commence à 0)
+      - history.state_at(k) : match_school après les k premières étapes
+      - history.page(k)     : bornes de la page du journal contenant l'étape k
+    """
+
+    def __init__(self, students, schools, interval=64):
+        self.students = students
+        self.schools = schools
+        self.interval = interval
+
+        self.proposers = array("i")
+        self.receivers = array("i")
+        self.displaced = array("i")
+        self.accepted = array("b")
+
+        self.current = array("i", [-1] * len(schools))
+        self.checkpoints = [array("i", self.current)]  # état après c * interval étapes
+
+    def __len__(self):
+        return len(self.proposers)
+
+    def append(self, event):
+        s, e, outcome, displaced = event
+        accepted = outcome == ACCEPTED
+
+        self.proposers.append(s)
+        self.receivers.append(e)
+        self.displaced.append(displaced)
+        self.accepted.append(accepted)
+
+        if accepted:
+            self.current[e] = s
+        if len(self) % self.interval == 0:
+            self.checkpoints.append(array("i", self.current))
+
+    def event(self, k):
+        return (self.proposers[k], self.receivers[k],
+                ACCEPTED if self.accepted[k] else REJECTED, self.displaced[k])
+
+    def state_at(self, k):
+        """Engagements (école -> étudiant, -1 si libre) après k étapes, en O(interval + n)."""
+        if not 0 <= k <= len(self):
+            raise IndexError(f"Étape {k} hors de l'historique (0 à {len(self)}).")
+        c = k // self.interval
+        state = array("i", self.checkpoints[c])
+        for j in range(c * self.interval, k):
+            if self.accepted[j]:
+                state[self.receivers[j]] = self.proposers[j]
+        return state
+
+    def engaged_at(self, k):
+        """Engagements après k étapes, en noms {école: étudiant ou None}."""
+        return {
+            e: (self.students[s] if s != -1 else None)
+            for e, s in zip(self.schools, self.state_at(k))
+        }
+
+    def page(self, k, page_size):
+        """(début, fin) de la page de page_size étapes qui contient l'étape k."""
+        start = (k // page_size) * page_size
+        return start, min(start + page_size, len(self))
+
+    def iter_steps(self, start=0, stop=None):
+        """
+        Produit (k, événement, engagements après l'étape k) pour start <= k < stop ;
+        l'état est reconstruit une fois puis mis à jour étape par étape.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        state = self.state_at(start)
+        for k in range(start, stop):
+            if self.accepted[k]:
+                state[self.receivers[k]] = self.proposers[k]
+            yield k, self.event(k), state
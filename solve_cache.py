@@ -0,0 +1,139 @@
+import hashlib
+import os
+import pickle
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from gale_shapley import gale_shapley
+from measures import compute_measures
+
+
+# =====================================================================
+# Cache des résolutions, indexé par empreinte de l'instance
+# =====================================================================
+#
+# L'empreinte est le SHA-256 de l'instance encodée en entiers (tailles puis
+# matrices de préférences en int32 little-endian) : elle ne dépend ni des
+# noms ni du format de lecture (CSV, binaire, générateur). La valeur stockée
+# est (match_school, mesures), sérialisée avec pickle.
+#
+# CACHE_VERSION fait partie de la clé (donc du nom des fichiers .pkl) : à
+# incrémenter dès que gale_shapley() ou compute_measures() change de
+# résultat, pour que les entrées déjà sur disque ne soient plus servies.
+
+CACHE_VERSION = 1
+
+def instance_fingerprint(instance):
+    """Empreinte hexadécimale d'une IndexedInstance (gale_shapley.py)."""
+    h = hashlib.sha256()
+    h.update(struct.pack("<II", instance.n_students, instance.n_schools))
+    h.update(np.ascontiguousarray(instance.prefs_students, dtype="<i4").tobytes())
+    h.update(np.ascontiguousarray(instance.prefs_schools, dtype="<i4").tobytes())
+    return h.hexdigest()
+
+
+class SolveCache:
+    """
+    Cache à deux niveaux :
+      - mémoire : LRU borné par la taille totale des valeurs sérialisées
+        (max_bytes), l'entrée la moins récemment utilisée est évincée ;
+      - disque (optionnel) : un fichier <clé>.pkl par entrée dans `directory`,
+        relu en cas d'absence en mémoire.
+    Les accès sont protégés par un verrou : le cache partagé de get_cache()
+    sert à la fois au thread de l'interface et à celui du benchmark.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()  # clé -> octets sérialisés
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Valeur associée à key, ou None."""
+        with self._lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+            elif self.directory is not None and os.path.exists(self._path(key)):
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                self._remember(key, data)
+
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(data)
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, data)
+
+            if self.directory is not None:
+                # écriture atomique : un lecteur ne voit jamais un fichier partiel
+                tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+
+    def _remember(self, key, data):
+        # appelé verrou tenu
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        if len(data) > self.max_bytes:
+            return  # trop gros pour la mémoire, reste sur disque s'il y en a un
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        """Vide le niveau mémoire (les fichiers sur disque sont conservés)."""
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(directory=None):
+    """Cache partagé du processus pour un répertoire donné (None = mémoire seule)."""
+    with _caches_lock:
+        if directory not in _caches:
+            _caches[directory] = SolveCache(directory=directory)
+        return _caches[directory]
+
+
+def solve_cached(instance, side="students", cache=None):
+    """
+    Comme gale_shapley(instance, side) suivi de compute_measures(), mais
+    consulte d'abord le cache. Retourne (match_school, mesures).
+    """
+    cache = get_cache() if cache is None else cache
+    key = f"{instance_fingerprint(instance)}-{side}-v{CACHE_VERSION}"
+
+    value = cache.get(key)
+    if value is None:
+        match_school = gale_shapley(instance, side)
+        value = (match_school, compute_measures(instance, match_school))
+        cache.put(key, value)
+    return value
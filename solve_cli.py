@@ -0,0 +1,221 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from binary_instance import MAGIC, load_indexed_instance, read_binary_instance, to_prefs_dicts
+from gale_shapley import SIDES, gale_shapley, index_instance, solve_both
+from mariage_stable_mesure import read_instance
+from measures import DEFAULT_MEASURES, MEASURE_NAMES, json_measure, select_measures
+from sparse_instance import compute_measures_sparse, gale_shapley_sparse, index_sparse_instance
+
+
+# =====================================================================
+# Résolution en ligne de commande (sans Streamlit ni matplotlib)
+# =====================================================================
+#
+#   python3 solve_cli.py instance.gsinst -o matching.csv --side both --measures all
+#
+# Le matching est écrit au fil de l'eau, une ligne par école :
+#   CSV   : instance,side,school,student   (student vide si l'école est libre)
+#   JSONL : {"instance", "side", "school", "student"}   (student null)
+# Les mesures sont écrites à part, une ligne JSON par instance et par côté
+# (--measures-output, par défaut sur la sortie d'erreur). Une mesure non
+# définie (NaN, ex. rang moyen sans aucun agent apparié) y vaut null.
+
+# --- Lecture -------------------------------------------------------
+
+def detect_format(path):
+    """"binary" si le fichier commence par l'en-tête de binary_instance.py, sinon "csv"."""
+    with open(path, "rb") as f:
+        return "binary" if f.read(len(MAGIC)) == MAGIC else "csv"
+
+
+def read_prefs(path, fmt):
+    """Dictionnaires de noms (format de read_instance()), quel que soit le format."""
+    if fmt == "binary":
+        return to_prefs_dicts(*read_binary_instance(path))
+    return read_instance(path)
+
+
+# --- Moteurs -------------------------------------------------------
+#
+#   load(path, fmt)                    -> instance encodée
+#   solve(instance, sides)             -> {côté: match_school}
+#   measures(instance, match, names)   -> {nom: valeur}
+# sides et measure_names : côtés proposants et mesures disponibles.
+
+Engine = namedtuple("Engine", "load solve measures sides measure_names")
+
+
+def _load_fast(path, fmt):
+    if fmt == "binary":
+        return load_indexed_instance(path)  # matrices d'entiers, sans dictionnaires de noms
+    return index_instance(*read_instance(path))
+
+
+def _solve_fast(instance, sides):
+    if len(sides) == 2:
+        # en série : --workers répartit déjà les instances, pas de pool imbriqué
+        return solve_both(instance)
+    return {sides[0]: gale_shapley(instance, sides[0])}
+
+
+def _sparse_measures(instance, match_school, names):
+    measures = compute_measures_sparse(instance, match_school)
+    return {name: measures[name] for name in names}
+
+
+ENGINES = {
+    "fast": Engine(
+        load=_load_fast,
+        solve=_solve_fast,
+        measures=select_measures,
+        sides=SIDES,
+        measure_names=MEASURE_NAMES,
+    ),
+    "sparse": Engine(
+        load=lambda path, fmt: index_sparse_instance(*read_prefs(path, fmt)),
+        solve=lambda instance, sides: {"students": gale_shapley_sparse(instance)},
+        measures=_sparse_measures,
+        sides=("students",),
+        measure_names=("avg_rank_students", "avg_rank_schools", "egalitarian_cost", "welfare",
+                       "pareto_optimal", "unmatched_students", "unmatched_schools"),
+    ),
+}
+
+
+def solve_file(task):
+    """
+    Lit, résout et mesure une instance (exécuté éventuellement dans un worker).
+    task = (chemin, format, moteur, côtés, mesures).
+    Retourne (chemin, étudiants, écoles, [(côté, match_school, mesures)], durée).
+    """
+    path, fmt, engine_name, sides, measure_names = task
+    engine = ENGINES[engine_name]
+    start = time.perf_counter()
+
+    instance = engine.load(path, detect_format(path) if fmt == "auto" else fmt)
+    solved = engine.solve(instance, sides)
+    results = [
+        (side, solved[side], engine.measures(instance, solved[side], measure_names) if measure_names else None)
+        for side in sides
+    ]
+    return path, instance.students, instance.schools, results, time.perf_counter() - start
+
+
+# --- Écriture ------------------------------------------------------
+
+def matching_rows(path, students, schools, side, match_school):
+    for e, s in enumerate(match_school):
+        yield path, side, schools[e], students[s] if s != -1 else None
+
+
+def write_matching(out, output_format, rows):
+    if output_format == "jsonl":
+        keys = ("instance", "side", "school", "student")
+        out.writelines(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n" for row in rows)
+    else:
+        csv.writer(out).writerows(("" if v is None else v for v in row) for row in rows)
+
+
+def measures_line(path, side, elapsed, measures):
+    record = {"instance": path, "side": side, "time": elapsed,
+              **{name: json_measure(value) for name, value in measures.items()}}
+    return json.dumps(record, ensure_ascii=False, allow_nan=False) + "\n"
+
+
+def open_output(path, **kwargs):
+    return open(path, "w", encoding="utf-8", **kwargs) if path != "-" else None
+
+
+# --- Ligne de commande ---------------------------------------------
+
+def parse_measures(value, available):
+    """"all", "none" ou une liste séparée par des virgules (noms de `available`)."""
+    if value == "all":
+        return list(available)
+    if value == "none":
+        return []
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"mesures inconnues pour ce moteur : {', '.join(unknown)} "
+                         f"(disponibles : {', '.join(available)})")
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résout des instances de mariage stable sans interface.")
+    parser.add_argument("inputs", nargs="+", help="fichiers d'instance (CSV ou binaire .gsinst)")
+    parser.add_argument("-o", "--output", default="-", help="matching (défaut : sortie standard)")
+    parser.add_argument("--format", choices=["auto", "csv", "binary"], default="auto",
+                        help="format des entrées (auto : détecté d'après l'en-tête)")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"],
+                        help="format du matching (défaut : d'après l'extension de --output, sinon csv)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="fast")
+    parser.add_argument("--side", choices=list(SIDES) + ["both"], default="students",
+                        help="côté proposant")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="instances résolues en parallèle")
+    parser.add_argument("--parallel", choices=["thread", "process"], default="thread",
+                        help="pool des workers (défaut : %(default)s)")
+    parser.add_argument("--measures", default=",".join(DEFAULT_MEASURES),
+                        help=f"mesures séparées par des virgules, 'all' ou 'none' parmi : {', '.join(MEASURE_NAMES)} "
+                             f"(défaut : %(default)s)")
+    parser.add_argument("--measures-output", default=None,
+                        help="fichier JSON lines des mesures (défaut : sortie d'erreur)")
+    args = parser.parse_args(argv)
+
+    engine = ENGINES[args.engine]
+    sides = list(SIDES) if args.side == "both" else [args.side]
+    if any(side not in engine.sides for side in sides):
+        parser.error(f"le moteur {args.engine} ne gère que le côté {', '.join(engine.sides)}")
+    try:
+        measure_names = parse_measures(args.measures, engine.measure_names)
+    except ValueError as exc:
+        parser.error(str(exc))
+    output_format = args.output_format or ("jsonl" if args.output.endswith((".jsonl", ".json")) else "csv")
+
+    parallel = args.parallel if args.workers > 1 else None
+    tasks = [(path, args.format, args.engine, sides, measure_names) for path in args.inputs]
+
+    out = open_output(args.output, newline="") or sys.stdout
+    measures_out = open_output(args.measures_output) if args.measures_output else sys.stderr
+    executor = None
+    try:
+        if output_format == "csv":
+            csv.writer(out).writerow(["instance", "side", "school", "student"])
+
+        if parallel is None or len(tasks) == 1:
+            solved = map(solve_file, tasks)
+        else:
+            pool = ProcessPoolExecutor if parallel == "process" else ThreadPoolExecutor
+            executor = pool(max_workers=args.workers)
+            solved = executor.map(solve_file, tasks)
+
+        # résultats écrits dans l'ordre des entrées, dès qu'ils sont disponibles
+        for path, students, schools, results, elapsed in solved:
+            for side, match_school, measures in results:
+                write_matching(out, output_format, matching_rows(path, students, schools, side, match_school))
+                if measures is not None:
+                    measures_out.write(measures_line(path, side, elapsed, measures))
+            out.flush()
+    except (OSError, ValueError) as exc:
+        print(f"Erreur : {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if out is not sys.stdout:
+            out.close()
+        if measures_out is not sys.stderr:
+            measures_out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
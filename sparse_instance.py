@@ -0,0 +1,178 @@
+from array import array
+from collections import deque
+
+
+# =====================================================================
+# 1) Instance à listes incomplètes, stockage creux
+# =====================================================================
+
+class SparseInstance:
+    """
+    Instance où chaque agent ne classe qu'une partie de l'autre côté.
+    La mémoire est proportionnelle à la longueur totale des listes :
+
+      - listes des étudiants au format CSR :
+        choices[offsets[s]:offsets[s + 1]] = écoles classées par s, dans l'ordre
+      - school_ranks[e] = {étudiant: rang} pour les seuls étudiants classés par e
+
+    Une paire (s, e) est acceptable si chacun classe l'autre.
+    """
+
+    def __init__(self, students, schools, offsets, choices, school_ranks):
+        self.students = students
+        self.schools = schools
+        self.n_students = len(students)
+        self.n_schools = len(schools)
+        self.offsets = offsets
+        self.choices = choices
+        self.school_ranks = school_ranks
+
+    def student_list(self, s):
+        """Écoles classées par l'étudiant s (identifiants)."""
+        return self.choices[self.offsets[s]:self.offsets[s + 1]]
+
+
+def index_sparse_instance(prefs_students, prefs_schools):
+    """Encode des listes (éventuellement tronquées) lues par read_instance()."""
+    students = list(prefs_students)
+    schools = list(prefs_schools)
+    student_ids = {name: i for i, name in enumerate(students)}
+    school_ids = {name: i for i, name in enumerate(schools)}
+
+    offsets = array("i", [0])
+    choices = array("i")
+    for s in students:
+        for e in prefs_students[s]:
+            if e not in school_ids:
+                raise ValueError(f"L'étudiant {s} classe une école inconnue : {e}")
+            choices.append(school_ids[e])
+        offsets.append(len(choices))
+
+    school_ranks = []
+    for e in schools:
+        ranks = {}
+        for k, s in enumerate(prefs_schools[e]):
+            if s not in student_ids:
+                raise ValueError(f"L'école {e} classe un étudiant inconnu : {s}")
+            ranks[student_ids[s]] = k
+        school_ranks.append(ranks)
+
+    return SparseInstance(students, schools, offsets, choices, school_ranks)
+
+
+# =====================================================================
+# 2) Gale–Shapley sur listes incomplètes
+# =====================================================================
+
+def gale_shapley_sparse(instance):
+    """
+    Étudiants proposants ; une école refuse tout étudiant qu'elle ne classe pas.
+    Un étudiant qui épuise sa liste reste libre. Coût proportionnel à la
+    longueur totale des listes.
+    Retourne match_school : école -> étudiant (-1 si libre).
+    """
+    offsets, choices, school_ranks = instance.offsets, instance.choices, instance.school_ranks
+
+    next_choice = list(offsets[:-1])
+    match_school = [-1] * instance.n_schools
+    free = deque(range(instance.n_students))
+
+    while free:
+        s = free.popleft()
+        end = offsets[s + 1]
+
+        while next_choice[s] < end:
+            e = choices[next_choice[s]]
+            next_choice[s] += 1
+
+            ranks = school_ranks[e]
+            r = ranks.get(s)
+            if r is None:
+                continue  # s n'est pas acceptable pour e
+
+            current = match_school[e]
+            if current == -1:
+                match_school[e] = s
+                break
+            if r < ranks[current]:
+                match_school[e] = s
+                free.appendleft(current)
+                break
+
+    return match_school
+
+
+def mariage_stable_sparse(pref_student, pref_school):
+    """
+    Variante de mariage_stable() pour des listes incomplètes.
+    Retourne engaged {école: étudiant ou None} ; les étudiants non appariés
+    sont ceux qui n'apparaissent pas dans les valeurs.
+    """
+    instance = index_sparse_instance(pref_student, pref_school)
+    match_school = gale_shapley_sparse(instance)
+    students = instance.students
+    return {e: (students[s] if s != -1 else None) for e, s in zip(instance.schools, match_school)}
+
+
+# =====================================================================
+# 3) Mesures et stabilité sur le stockage creux
+# =====================================================================
+
+def match_students(instance, match_school):
+    """Inverse match_school : étudiant -> école (-1 si libre)."""
+    match_student = [-1] * instance.n_students
+    for e, s in enumerate(match_school):
+        if s != -1:
+            match_student[s] = e
+    return match_student
+
+
+def blocking_pairs_sparse(instance, match_school):
+    """
+    Paires bloquantes (s, e) en identifiants : pour chaque étudiant, on ne
+    parcourt que les écoles de sa liste placées avant son affectation.
+    """
+    match_student = match_students(instance, match_school)
+    pairs = []
+
+    for s in range(instance.n_students):
+        for e in instance.student_list(s):
+            if e == match_student[s]:
+                break
+            ranks = instance.school_ranks[e]
+            r = ranks.get(s)
+            if r is None:
+                continue
+            current = match_school[e]
+            if current == -1 or r < ranks[current]:
+                pairs.append((s, e))
+
+    return pairs
+
+
+def compute_measures_sparse(instance, match_school):
+    """
+    Mesures de compute_all_measures() sur une SparseInstance : les rangs ne
+    portent que sur les agents appariés, les non appariés sont comptés à part.
+    """
+    match_student = match_students(instance, match_school)
+
+    ranks_students = [
+        instance.student_list(s).index(e) for s, e in enumerate(match_student) if e != -1
+    ]
+    ranks_schools = [
+        instance.school_ranks[e][s] for e, s in enumerate(match_school) if s != -1
+    ]
+
+    n = instance.n_schools
+    welfare = sum(1 - r / (n - 1) for r in ranks_students) + sum(1 - r / (n - 1) for r in ranks_schools)
+
+    return {
+        "avg_rank_students": sum(ranks_students) / len(ranks_students) if ranks_students else float('nan'),
+        "avg_rank_schools": sum(ranks_schools) / len(ranks_schools) if ranks_schools else float('nan'),
+        "egalitarian_cost": sum(ranks_students) + sum(ranks_schools),
+        "welfare": welfare,
+        "pareto_optimal": not blocking_pairs_sparse(instance, match_school),
+        "unmatched_students": instance.n_students - len(ranks_students),
+        "unmatched_schools": instance.n_schools - len(ranks_schools),
+    }
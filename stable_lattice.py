@@ -0,0 +1,325 @@
+from array import array
+from collections import deque
+
+from gale_shapley import deferred_acceptance, index_instance, to_engaged
+
+
+# =====================================================================
+# Treillis des matchings stables : rotations et poset des rotations
+# =====================================================================
+#
+# Tout matching stable s'obtient à partir du matching étudiant-optimal M0 en
+# éliminant un ensemble de rotations fermé vers le bas (un idéal) du poset des
+# rotations. Une rotation [(s0, f0), ..., (sk, fk)] fait passer chaque s_i de
+# f_i à f_{i+1} (indices modulo k + 1) : les étudiants descendent dans leur
+# liste, les écoles montent.
+
+class RotationPoset:
+    """
+    Rotations d'une IndexedInstance (gale_shapley.py) et leurs précédences.
+
+      - match_school0 : matching étudiant-optimal (école -> étudiant)
+      - rotations[r]  : liste de paires (étudiant, école quittée)
+      - preds[r]      : rotations à éliminer avant r (sous-graphe générateur)
+      - succs[r]      : rotations qui dépendent de r
+      - weights[r]    : variation du coût égalitaire quand r est éliminée
+
+    L'ordre des indices est un ordre topologique (ordre d'élimination).
+    """
+
+    def __init__(self, instance, match_school0, rotations, preds):
+        self.instance = instance
+        self.match_school0 = match_school0
+        self.rotations = rotations
+        self.preds = preds
+        self.succs = [[] for _ in rotations]
+        for r, pred in enumerate(preds):
+            for p in pred:
+                self.succs[p].append(r)
+        self.weights = [rotation_weight(instance, rot) for rot in rotations]
+
+    def apply(self, match_school, r):
+        """Élimine la rotation r dans match_school (modifié sur place)."""
+        rotation = self.rotations[r]
+        k = len(rotation)
+        for i, (s, _) in enumerate(rotation):
+            match_school[rotation[(i + 1) % k][1]] = s
+
+    def undo(self, match_school, r):
+        """Annule apply(match_school, r)."""
+        for s, f in self.rotations[r]:
+            match_school[f] = s
+
+
+def rotation_weight(instance, rotation):
+    """Variation du coût égalitaire (somme des rangs des deux côtés) due à la rotation."""
+    n, m = instance.n_students, instance.n_schools
+    rank_students, rank_schools = instance.rank_students, instance.rank_schools
+    k = len(rotation)
+    delta = 0
+    for i, (s, f) in enumerate(rotation):
+        s_next, f_next = rotation[(i + 1) % k]
+        delta += rank_students[s * m + f_next] - rank_students[s * m + f]
+        delta += rank_schools[f_next * n + s] - rank_schools[f_next * n + s_next]
+    return delta
+
+
+def build_rotation_poset(instance):
+    """
+    Construit toutes les rotations et leur poset en O(n²) :
+      1) M0 (étudiants proposants) et Mz (écoles proposantes) ;
+      2) depuis M0, chaque étudiant avance un pointeur dans sa liste vers la
+         première école qui le préfère à son partenaire actuel (next), on suit
+         s -> partenaire de next(s) avec une pile et chaque cycle trouvé est
+         une rotation exposée que l'on élimine aussitôt ;
+      3) précédences : étudiants successifs d'une même rotation (règle 1) et
+         écoles "sautées" par un étudiant (règle 2).
+    """
+    n, m = instance.n_students, instance.n_schools
+    prefs_students = instance.prefs_students
+    rank_students, rank_schools = instance.rank_students, instance.rank_schools
+
+    match_school0 = deferred_acceptance(n, m, prefs_students, rank_schools)
+    match_student_z = deferred_acceptance(m, n, instance.prefs_schools, rank_students)
+
+    match_school = list(match_school0)
+    match_student = [-1] * n
+    for f, s in enumerate(match_school):
+        if s != -1:
+            match_student[s] = f
+
+    # pointeur dans la liste de chaque étudiant, juste après son partenaire
+    pointer = [rank_students[s * m + match_student[s]] + 1 if match_student[s] != -1 else m for s in range(n)]
+
+    def next_school(s):
+        base = s * m
+        while True:
+            f = prefs_students[base + pointer[s]]
+            current = match_school[f]
+            if current == -1 or rank_schools[f * n + s] < rank_schools[f * n + current]:
+                return f
+            pointer[s] += 1  # f a déjà mieux que s et ne fera que s'améliorer
+
+    rotations = []
+    student_rotations = [[] for _ in range(n)]  # rotations successives de chaque étudiant
+    school_history = [[] for _ in range(m)]     # (rotation, nouvel étudiant) pour chaque école
+    on_stack = [False] * n
+    stack = []
+
+    for s0 in range(n):
+        while stack or match_student[s0] != match_student_z[s0]:
+            if not stack:
+                stack.append(s0)
+                on_stack[s0] = True
+
+            s = stack[-1]
+            t = match_school[next_school(s)]
+            if not on_stack[t]:
+                stack.append(t)
+                on_stack[t] = True
+                continue
+
+            # cycle t -> ... -> s -> t : rotation exposée
+            start = len(stack) - 1 - stack[::-1].index(t)
+            cycle = stack[start:]
+            del stack[start:]
+
+            r = len(rotations)
+            rotation = [(u, match_student[u]) for u in cycle]
+            rotations.append(rotation)
+
+            targets = [next_school(u) for u in cycle]
+            for u, f in zip(cycle, targets):
+                on_stack[u] = False
+                student_rotations[u].append(r)
+                match_school[f] = u
+                match_student[u] = f
+                pointer[u] = rank_students[u * m + f] + 1
+                school_history[f].append((r, u))
+
+    # étiquette de (f, s) : rotation à laquelle f dépasse s sans le prendre
+    # (-1 : jamais), table plate indexée par f * n + s comme les tables de rangs
+    passed_at = array("i", [-1]) * (m * n)
+    for f in range(m):
+        previous = match_school0[f]
+        if previous == -1:
+            continue
+        for r, u in school_history[f]:
+            low, high = rank_schools[f * n + u] + 1, rank_schools[f * n + previous]
+            for k in range(low, high):
+                passed_at[f * n + instance.prefs_schools[f * n + k]] = r
+            previous = u
+
+    preds = [set() for _ in rotations]
+    for s in range(n):
+        sequence = student_rotations[s]
+        # règle 1 : l'étudiant doit être arrivé chez f avant de la quitter
+        for a, b in zip(sequence, sequence[1:]):
+            preds[b].add(a)
+
+    for r, rotation in enumerate(rotations):
+        k = len(rotation)
+        for i, (s, f) in enumerate(rotation):
+            f_next = rotation[(i + 1) % k][1]
+            # règle 2 : les écoles sautées doivent déjà avoir mieux que s
+            for pos in range(rank_students[s * m + f] + 1, rank_students[s * m + f_next]):
+                p = passed_at[prefs_students[s * m + pos] * n + s]
+                if p != -1 and p != r:
+                    preds[r].add(p)
+
+    return RotationPoset(instance, match_school0, rotations, [sorted(p) for p in preds])
+
+
+# =====================================================================
+# Énumération paresseuse des matchings stables
+# =====================================================================
+
+def iter_stable_matchings(poset):
+    """
+    Générateur de tous les matchings stables (match_school, copie) : chaque
+    idéal du poset est produit une seule fois, à partir de l'idéal obtenu en
+    retirant sa rotation d'indice maximal (délai polynomial entre deux résultats).
+    """
+    n_rot = len(poset.rotations)
+    missing = [len(p) for p in poset.preds]
+    match_school = list(poset.match_school0)
+    path = []
+    candidate = 0
+
+    yield list(match_school)
+
+    while True:
+        while candidate < n_rot and missing[candidate]:
+            candidate += 1
+
+        if candidate < n_rot:
+            poset.apply(match_school, candidate)
+            for succ in poset.succs[candidate]:
+                missing[succ] -= 1
+            path.append(candidate)
+            candidate += 1
+            yield list(match_school)
+        else:
+            if not path:
+                return
+            r = path.pop()
+            poset.undo(match_school, r)
+            for succ in poset.succs[r]:
+                missing[succ] += 1
+            candidate = r + 1
+
+
+def stable_matchings(prefs_students, prefs_schools):
+    """Générateur des matchings stables sous forme de dictionnaires engaged."""
+    instance = index_instance(prefs_students, prefs_schools)
+    for match_school in iter_stable_matchings(build_rotation_poset(instance)):
+        yield to_engaged(instance, match_school)
+
+
+# =====================================================================
+# Matching stable de coût égalitaire minimal (coupe minimale)
+# =====================================================================
+
+def _min_cut_source_side(n_nodes, edges, source, sink):
+    """
+    Flot maximal (Dinic) puis ensemble des sommets accessibles depuis la
+    source dans le graphe résiduel. edges = [(u, v, capacité)].
+    """
+    graph = [[] for _ in range(n_nodes)]
+    to, cap = [], []
+    for u, v, c in edges:
+        graph[u].append(len(to)); to.append(v); cap.append(c)
+        graph[v].append(len(to)); to.append(u); cap.append(0)
+
+    def bfs_levels():
+        level = [-1] * n_nodes
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in graph[u]:
+                if cap[e] > 0 and level[to[e]] == -1:
+                    level[to[e]] = level[u] + 1
+                    queue.append(to[e])
+        return level
+
+    while True:
+        level = bfs_levels()
+        if level[sink] == -1:
+            break
+        it = [0] * n_nodes
+
+        # recherche itérative de chemins augmentants dans le graphe de niveaux
+        while True:
+            path, u = [], source
+            while u != sink:
+                while it[u] < len(graph[u]):
+                    e = graph[u][it[u]]
+                    if cap[e] > 0 and level[to[e]] == level[u] + 1:
+                        break
+                    it[u] += 1
+                if it[u] == len(graph[u]):
+                    if not path:
+                        break
+                    level[u] = -1  # impasse
+                    e = path.pop()
+                    u = to[e ^ 1]
+                    it[u] += 1
+                    continue
+                e = graph[u][it[u]]
+                path.append(e)
+                u = to[e]
+            if u != sink:
+                break
+            pushed = min(cap[e] for e in path)
+            for e in path:
+                cap[e] -= pushed
+                cap[e ^ 1] += pushed
+
+    return bfs_levels()
+
+
+def egalitarian_optimal(poset):
+    """
+    Matching stable minimisant le coût égalitaire : idéal de poids minimal du
+    poset, obtenu par fermeture de poids maximal (Picard) = coupe minimale.
+    Retourne (match_school, coût égalitaire).
+    """
+    n_rot = len(poset.rotations)
+    source, sink = n_rot, n_rot + 1
+    infinite = sum(abs(w) for w in poset.weights) + 1
+
+    edges = []
+    for r, w in enumerate(poset.weights):
+        if w < 0:
+            edges.append((source, r, -w))  # rotation qui fait baisser le coût
+        elif w > 0:
+            edges.append((r, sink, w))
+        for p in poset.preds[r]:
+            edges.append((r, p, infinite))  # r éliminée => p éliminée
+
+    level = _min_cut_source_side(n_rot + 2, edges, source, sink)
+
+    match_school = list(poset.match_school0)
+    for r in range(n_rot):
+        if level[r] != -1:
+            poset.apply(match_school, r)
+
+    return match_school, egalitarian_cost_of(poset.instance, match_school)
+
+
+def egalitarian_cost_of(instance, match_school):
+    """Somme des rangs des deux côtés, comme egalitarian_cost()."""
+    n, m = instance.n_students, instance.n_schools
+    cost = 0
+    for f, s in enumerate(match_school):
+        if s != -1:
+            cost += instance.rank_students[s * m + f] + instance.rank_schools[f * n + s]
+    return cost
+
+
+def mariage_stable_egalitaire(prefs_students, prefs_schools):
+    """Matching stable de coût égalitaire minimal, au format engaged."""
+    instance = index_instance(prefs_students, prefs_schools)
+    match_school, _ = egalitarian_optimal(build_rotation_poset(instance))
+    return to_engaged(instance, match_school)
@@ -1,54 +1,248 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import sys, os
-import csv
+import io
+import random
+import time
+import weakref
+from collections import namedtuple
 
 # Ajout du dossier courant au PATH
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mariage_stable_mesure import (
-    mariage_stable,
-    compute_all_measures,
-    compute_ranks
-)
+from gale_shapley import index_instance
+from solve_cache import get_cache, solve_cached
 
 from generate_preference import (
     generate_preferences,
+    generate_preferences_ids,
     save_to_csv
 )
+from binary_instance import to_prefs_dicts
+from benchmark_io import BenchmarkWriter
+from results_store import RESULTS_DIR, scan, write_run
+
+
+def instance_seeds(nb_tests, seed=None):
+    """
+    Graine de chaque instance du benchmark : dérivée de seed et de l'indice,
+    elle ne dépend donc pas du nombre de processus utilisés.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    return [seed * 1_000_003 + i for i in range(nb_tests)]
+
+
+def generate_instance(n_students, n_schools, seed, model=None, model_params=None):
+    """
+    Instance du benchmark sous forme de dictionnaires de noms.
+    model=None : noms réels et préférences uniformes (generate_preferences) ;
+    sinon modèle de preference_models.py avec des noms synthétiques.
+    """
+    if model is None:
+        return generate_preferences(n_students, n_schools, seed=seed)
+
+    students, schools, matrix_students, matrix_schools = generate_preferences_ids(
+        n_students, n_schools, seed=seed, model=model, **(model_params or {}))
+    students, schools = list(students), list(schools)
+    prefs_students, prefs_schools = to_prefs_dicts(students, schools, matrix_students, matrix_schools)
+    return students, schools, prefs_students, prefs_schools
+
+
+# Résultat d'une instance renvoyé par un worker : les préférences n'y sont
+# pas (le collecteur les régénère à partir de la graine, voir
+# save_benchmark_results), seulement les mesures des deux côtés et, par côté,
+# (durée en s, trouvé en cache).
+InstanceResult = namedtuple("InstanceResult",
+                            "seed n_students n_schools model model_params measures measures_schools timings")
+
+
+def solve_instance(task):
+    """
+    Génère, résout et mesure une instance (exécuté dans un processus worker).
+    task = (graine, n_students, n_schools, model, model_params, cache_dir).
+    L'instance est encodée une seule fois pour les deux côtés proposants, et
+    chaque résolution passe par le cache (solve_cache.py) ; retourne un
+    InstanceResult.
+    """
+    instance_seed, n_students, n_schools, model, model_params, cache_dir = task
+
+    students, schools, prefs_students, prefs_schools = generate_instance(
+        n_students, n_schools, instance_seed, model, model_params)
+    instance = index_instance(prefs_students, prefs_schools)
+    cache = get_cache(cache_dir)
+    timings = {}
+
+    def timed(side):
+        hits, start = cache.hits, time.perf_counter()
+        _, side_measures = solve_cached(instance, side, cache)
+        timings[side] = (time.perf_counter() - start, cache.hits > hits)
+        return side_measures
+
+    measures = timed("students")
+    measures_schools = timed("schools")
+
+    return InstanceResult(instance_seed, n_students, n_schools, model, model_params,
+                          measures, measures_schools, timings)
+
+
+def run_instances(nb_tests, n_students, n_schools, seed=None, workers=None, model=None, model_params=None,
+                  cache_dir=None):
+    """
+    Exécute les nb_tests instances, en série ou réparties sur un
+    ProcessPoolExecutor de `workers` processus. Les résultats sont rendus
+    dans l'ordre des instances, quel que soit le nombre de workers.
+    cache_dir : répertoire du cache disque partagé par les workers (None =
+    cache mémoire propre à chaque processus).
+    """
+    tasks = [(s, n_students, n_schools, model, model_params, cache_dir)
+             for s in instance_seeds(nb_tests, seed)]
+
+    if workers is None or workers <= 1:
+        return [solve_instance(task) for task in tasks]
+
+    # importé à l'usage : multiprocessing n'est utile qu'avec plusieurs workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, nb_tests // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(solve_instance, tasks, chunksize=chunksize))
+
+
+def save_benchmark_results(results, filename="instances_bench_temp.csv", append=False):
+    """
+    Écrit les instances du benchmark dans le CSV, dans l'ordre des résultats,
+    avec un seul BenchmarkWriter (écriture par blocs + index annexe des
+    offsets, graines et mesures). Appelé par le processus principal, seul
+    collecteur des résultats des workers : les préférences sont régénérées
+    ici à partir de la graine de chaque instance. append=False remplace le fichier.
+    """
+    with BenchmarkWriter(filename, append=append) as writer:
+        for r in results:
+            students, schools, prefs_students, prefs_schools = generate_instance(
+                r.n_students, r.n_schools, r.seed, r.model, r.model_params)
+            writer.write_instance(students, schools, prefs_students, prefs_schools, r.seed, r.measures)
+    print(f"{len(results)} instances écrites dans '{filename}'.")
+
+
+# =====================================================================
+# Rendu des figures : PNG calculé une seule fois par figure
+# =====================================================================
+
+MAX_BARS = 50          # au-delà, mode "auto" = graphiques agrégés
+MAX_SERIES_POINTS = 200  # points affichés d'une série par instance (sous-échantillonnée)
+
+_png_cache = weakref.WeakKeyDictionary()  # figure -> {dpi: octets PNG}
+
+
+def _pyplot():
+    """matplotlib.pyplot, importé seulement pour tracer (les workers du benchmark n'en ont pas besoin)."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def figure_png(fig, dpi=300):
+    """Octets PNG de la figure, rastérisée une seule fois par résolution."""
+    by_dpi = _png_cache.setdefault(fig, {})
+    if dpi not in by_dpi:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi)
+        by_dpi[dpi] = buf.getvalue()
+    return by_dpi[dpi]
+
+
+def save_figure(fig, filename, dpi=300):
+    """Écrit la figure en PNG en réutilisant les octets de figure_png()."""
+    with open(filename, "wb") as f:
+        f.write(figure_png(fig, dpi))
+
+
+def _downsample(values, max_points=MAX_SERIES_POINTS):
+    """
+    Série par instance réduite à au plus max_points paquets consécutifs :
+    (position centrale, moyenne, minimum, maximum) de chaque paquet.
+    """
+    values = np.asarray(values, dtype=float)
+    chunks = np.array_split(np.arange(values.size), min(max_points, values.size))
+    x = np.array([c.mean() + 1 for c in chunks])
+    return (x,
+            np.array([values[c].mean() for c in chunks]),
+            np.array([values[c].min() for c in chunks]),
+            np.array([values[c].max() for c in chunks]))
+
+
+def _plot_series(ax, values, label, color):
+    x, mean, low, high = _downsample(values)
+    ax.plot(x, mean, color=color, label=label, linewidth=1)
+    if len(x) < len(values):
+        ax.fill_between(x, low, high, color=color, alpha=0.2)
+
+
+def plot_aggregated(rank_students, rank_schools, welfare_total, welfare_school_optimal,
+                    egalitarian_total, output_dir="plots", dpi=300):
+    """
+    Version agrégée des trois graphiques pour un grand nombre d'instances :
+    distributions (histogrammes, boîtes à moustaches) et séries par instance
+    sous-échantillonnées (moyenne par paquet + bande min/max).
+    """
+    plt = _pyplot()
+    nb = len(rank_students)
+
+    # ===== Rang moyen : histogrammes + boîtes =====
+    fig1, (ax1a, ax1b) = plt.subplots(1, 2, figsize=(9, 3.5))
+    ax1a.hist(rank_students, bins="auto", alpha=0.6, label="Étudiants")
+    ax1a.hist(rank_schools, bins="auto", alpha=0.6, label="Écoles")
+    ax1a.set_xlabel("Rang moyen (0 = meilleur)")
+    ax1a.set_ylabel("Nombre d'instances")
+    ax1a.legend()
+    ax1b.boxplot([rank_students, rank_schools])
+    ax1b.set_xticks([1, 2], ["Étudiants", "Écoles"])
+    ax1b.set_ylabel("Rang moyen")
+    fig1.suptitle(f"Rang moyen sur {nb} instances")
+    for ax in (ax1a, ax1b):
+        ax.grid(True, axis="y", linestyle="--", alpha=0.5)
+    fig1.tight_layout()
+    save_figure(fig1, os.path.join(output_dir, "hist_rang_moyen_plus_moyenne.png"), dpi)
+
+    # ===== Welfare : série par instance + violons étudiants/écoles-optimal =====
+    fig2, (ax2a, ax2b) = plt.subplots(1, 2, figsize=(9, 3.5), gridspec_kw={"width_ratios": [2, 1]})
+    _plot_series(ax2a, welfare_total, "Optimal étudiants", "tab:blue")
+    _plot_series(ax2a, welfare_school_optimal, "Optimal écoles", "tab:purple")
+    ax2a.set_xlabel("Instances")
+    ax2a.set_ylabel("Welfare (plus haut = mieux)")
+    ax2a.legend()
+    ax2b.violinplot([welfare_total, welfare_school_optimal], showmedians=True)
+    ax2b.set_xticks([1, 2], ["Opt. étudiants", "Opt. écoles"])
+    fig2.suptitle(f"Welfare sur {nb} instances")
+    for ax in (ax2a, ax2b):
+        ax.grid(True, axis="y", linestyle="--", alpha=0.5)
+    fig2.tight_layout()
+    save_figure(fig2, os.path.join(output_dir, "hist_welfare_plus_moyenne.png"), dpi)
+
+    # ===== Coût égalitaire : série par instance + histogramme =====
+    fig3, (ax3a, ax3b) = plt.subplots(1, 2, figsize=(9, 3.5), gridspec_kw={"width_ratios": [2, 1]})
+    _plot_series(ax3a, egalitarian_total, "Coût égalitaire", "tab:orange")
+    ax3a.axhline(np.mean(egalitarian_total), color="tab:red", linestyle="--", label="Moyenne")
+    ax3a.set_xlabel("Instances")
+    ax3a.set_ylabel("Coût total (plus bas = meilleur)")
+    ax3a.legend()
+    ax3b.hist(egalitarian_total, bins="auto", orientation="horizontal", color="tab:orange")
+    ax3b.set_xlabel("Nombre d'instances")
+    fig3.suptitle(f"Coût égalitaire sur {nb} instances")
+    for ax in (ax3a, ax3b):
+        ax.grid(True, axis="y", linestyle="--", alpha=0.5)
+    fig3.tight_layout()
+    save_figure(fig3, os.path.join(output_dir, "hist_egalitarian_plus_moyenne.png"), dpi)
 
-def save_to_csv_bench(students, schools, prefs_students, prefs_schools, filename="instances_bench_temp.csv"):
-    """Ajoute les préférences dans un fichier CSV sans écraser les données existantes."""
-
-    file_exists = os.path.isfile(filename)
-
-    with open(filename, "a", newline="", encoding="utf-8") as f:  # "a" = append mode
-        writer = csv.writer(f)
-
-        # Si le fichier n'existe pas encore → écrire l'en-tête
-        if not file_exists:
-            writer.writerow(["Type", "Nom", "Préférences"])
-
-        # Étudiants
-        for s in students:
-            writer.writerow(["Etudiant", s, " - ".join(prefs_students[s])])
-
-        # Écoles
-        for e in schools:
-            writer.writerow(["Ecole", e, " - ".join(prefs_schools[e])])
-
-        # Ligne vide entre chaque instance pour lisibilité
-        writer.writerow([])
-
-    print(f"Données ajoutées à '{filename}' avec succès.")
-
-def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
+    return fig1, fig2, fig3
 
-    # Création du dossier plots/
-    output_dir = "plots"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
+def plot_benchmark_results(results, output_dir="plots", mode="auto", dpi=300):
+    """
+    Graphiques du benchmark à partir des résultats de run_instances() (ou
+    d'une partie d'entre eux) ; retourne (fig1, fig2, fig3).
+    mode : "bars" (une barre par instance), "aggregate" (distributions) ou
+    "auto" (barres jusqu'à MAX_BARS instances).
+    """
     rank_students = []
     rank_schools = []
 
@@ -59,42 +253,61 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     #egalitarian_schools = []
 
     welfare_total = []
+    welfare_school_optimal = []
     egalitarian_total = []
 
-    for _ in range(nb_tests):
-        
-        students, schools, prefs_students, prefs_schools = generate_preferences(n_students, n_schools)
-        save_to_csv_bench(students, schools, prefs_students, prefs_schools, filename="instances_bench_temp.csv")
+    for r in results:
+        # ===== Rang moyen =====
+        rank_students.append(r.measures["avg_rank_students"])
+        rank_schools.append(r.measures["avg_rank_schools"])
 
-        # Mariage stable
-        engaged = mariage_stable(prefs_students, prefs_schools)
+        # ===== Welfare et coût égalitaire (étudiants + établissements) =====
+        welfare_total.append(r.measures["welfare"])
+        welfare_school_optimal.append(r.measures_schools["welfare"])
+        egalitarian_total.append(r.measures["egalitarian_cost"])
 
-        # recuperation des mesures
-        measures = compute_all_measures(prefs_students, prefs_schools, engaged)
+    return plot_measures(rank_students, rank_schools, welfare_total, welfare_school_optimal,
+                         egalitarian_total, output_dir, mode, dpi)
 
-        # ===== Rang moyen =====
-        rank_students.append(measures["avg_rank_students"])
-        rank_schools.append(measures["avg_rank_schools"])
 
-        # ===== Welfare séparé : on decompose le walfare globale pour les etudiants et les etablissements=====
-        ranks_stu, ranks_sch = compute_ranks(prefs_students, prefs_schools, engaged)
-        n = n_schools - 1
+def plot_stored_run(run_id, directory=RESULTS_DIR, output_dir="plots", mode="auto", dpi=300):
+    """
+    Graphiques d'une exécution enregistrée dans le magasin de résultats
+    (results_store.py), sans rien recalculer ; retourne (fig1, fig2, fig3).
+    """
+    columns = ["instance", "avg_rank_students", "avg_rank_schools", "welfare", "egalitarian_cost"]
+    students = scan(directory, columns, run_id=run_id, side="students").sort_by("instance").to_pydict()
+    schools = scan(directory, columns, run_id=run_id, side="schools").sort_by("instance").to_pydict()
 
-        #welfare_students.append(sum(1 - r/n for r in ranks_stu.values()))
-        #welfare_schools.append(sum(1 - r/n for r in ranks_sch.values()))
+    return plot_measures(students["avg_rank_students"], students["avg_rank_schools"], students["welfare"],
+                         schools["welfare"], students["egalitarian_cost"], output_dir, mode, dpi)
 
-        welfare = sum(1 - r/n for r in ranks_stu.values()) + sum(1 - r/n for r in ranks_sch.values())
-        welfare_total.append(welfare)
 
-        # ===== Egalitarian cost séparé: on separe aussi  =====
-        #egalitarian_students.append(sum(ranks_stu.values()))
-        #egalitarian_schools.append(sum(ranks_sch.values()))
+def plot_measures(rank_students, rank_schools, welfare_total, welfare_school_optimal, egalitarian_total,
+                  output_dir="plots", mode="auto", dpi=300):
+    """
+    Trace les trois graphiques à partir des séries par instance (matching
+    étudiant-optimal, plus le welfare école-optimal) ; retourne (fig1, fig2, fig3).
+    """
 
-        egalitarian = sum(ranks_stu.values()) + sum(ranks_sch.values())
-        egalitarian_total.append(egalitarian)
-    
-    
-    tests = np.arange(1, nb_tests+1)
+    # Création du dossier plots/
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    rank_students = list(rank_students)
+    rank_schools = list(rank_schools)
+    welfare_total = list(welfare_total)
+    welfare_school_optimal = list(welfare_school_optimal)
+    egalitarian_total = list(egalitarian_total)
+
+    if mode == "auto":
+        mode = "aggregate" if len(rank_students) > MAX_BARS else "bars"
+    if mode == "aggregate":
+        return plot_aggregated(rank_students, rank_schools, welfare_total, welfare_school_optimal,
+                               egalitarian_total, output_dir, dpi)
+
+    plt = _pyplot()
+    tests = np.arange(1, len(rank_students)+1)
     bar_width = 0.35  # largeur des barres
 
     mean_rank_stu = np.mean(rank_students)
@@ -107,6 +320,7 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     #mean_egal_sch = np.mean(egalitarian_schools)
 
     mean_welfare_total = np.mean(welfare_total)
+    mean_welfare_school_optimal = np.mean(welfare_school_optimal)
     mean_egalitarian_total = np.mean(egalitarian_total)
 
 
@@ -138,7 +352,7 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     ax1.legend()
     ax1.grid(True, axis="y", linestyle="--", alpha=0.5)
     fig1.tight_layout()
-    fig1.savefig(os.path.join(output_dir, "hist_rang_moyen_plus_moyenne.png"), dpi=300)
+    save_figure(fig1, os.path.join(output_dir, "hist_rang_moyen_plus_moyenne.png"), dpi)
 
 
 
@@ -153,6 +367,7 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     #welfare_schools_extended  = welfare_schools  + [mean_welfare_sch]
 
     welfare_total_extended = welfare_total + [mean_welfare_total]
+    welfare_school_optimal_extended = welfare_school_optimal + [mean_welfare_school_optimal]
 
 
     labels_welfare = [i for i in tests] + ["Moyenne"]
@@ -165,8 +380,13 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     #bars_students[-1].set_color("tab:green")   # barres Étudiants moyenne
     #bars_schools[-1].set_color("tab:red")      # barres Écoles moyenne
 
-    bars_welfare = ax2.bar(pos, welfare_total_extended, color="tab:blue", width=bar_width)
+    # Matching étudiant-optimal (Gale–Shapley classique) vs école-optimal
+    bars_welfare = ax2.bar(pos - bar_width/2, welfare_total_extended, color="tab:blue",
+                           width=bar_width, label="Optimal étudiants")
+    bars_welfare_schools = ax2.bar(pos + bar_width/2, welfare_school_optimal_extended, color="tab:purple",
+                                   width=bar_width, label="Optimal écoles")
     bars_welfare[-1].set_color("tab:green")
+    bars_welfare_schools[-1].set_color("tab:red")
 
     ax2.set_xticks(pos)
     ax2.set_xticklabels(labels_welfare, rotation=45)
@@ -176,7 +396,7 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     ax2.legend()
     ax2.grid(True, axis="y", linestyle="--", alpha=0.8)
     fig2.tight_layout()
-    fig2.savefig(os.path.join(output_dir, "hist_welfare_plus_moyenne.png"), dpi=300)
+    save_figure(fig2, os.path.join(output_dir, "hist_welfare_plus_moyenne.png"), dpi)
 
 
 
@@ -212,11 +432,42 @@ def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15):
     ax3.legend()
     ax3.grid(True, axis="y", linestyle="--", alpha=0.5)
     fig3.tight_layout()
-    fig3.savefig(os.path.join(output_dir, "hist_egalitarian_plus_moyenne.png"), dpi=300)
+    save_figure(fig3, os.path.join(output_dir, "hist_egalitarian_plus_moyenne.png"), dpi)
 
     return fig1, fig2, fig3
 
 
+def test_measures_with_graphs(nb_tests=20, n_students=15, n_schools=15, seed=None, workers=None,
+                              model=None, model_params=None, cache_dir=None, plot_mode="auto",
+                              store_dir=RESULTS_DIR):
+    """
+    Benchmark complet : instances, CSV, mesures dans le magasin de résultats
+    (store_dir, None pour ne pas les enregistrer) et graphiques. Sans pyarrow,
+    les mesures ne sont pas enregistrées et les graphiques sont tracés
+    directement à partir des résultats.
+    """
+
+    if seed is None:
+        seed = random.randrange(2**32)  # fixée ici pour être enregistrée dans l'index
+
+    # Génération + mariage stable + mesures (éventuellement en parallèle),
+    # puis écriture du CSV dans l'ordre des instances par le processus principal
+    results = run_instances(nb_tests, n_students, n_schools, seed=seed, workers=workers,
+                            model=model, model_params=model_params, cache_dir=cache_dir)
+
+    save_benchmark_results(results, filename="instances_bench_temp.csv")
+    if store_dir is None:
+        return plot_benchmark_results(results, mode=plot_mode)
+
+    try:
+        run_id = write_run(results, generator=model, directory=store_dir)
+    except ImportError as exc:
+        print(f"Mesures non enregistrées ({exc})")
+        return plot_benchmark_results(results, mode=plot_mode)
+    print(f"Mesures enregistrées dans '{store_dir}' (exécution {run_id}).")
+    return plot_stored_run(run_id, store_dir, mode=plot_mode)
+
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from benchmark_io import (BenchmarkWriter, index_filename, iter_instances_with_offsets, read_benchmark_index,
+                          read_benchmark_instance)
+from binary_instance import to_prefs_dicts
+from generate_preference import generate_preferences_ids
+
+
+def make_instance(n_students, n_schools, seed):
+    students, schools, prefs_students, prefs_schools = generate_preferences_ids(n_students, n_schools, seed=seed)
+    students, schools = list(students), list(schools)
+    return (students, schools) + to_prefs_dicts(students, schools, prefs_students, prefs_schools)
+
+
+def write_all(filename, instances, append=False, batch_bytes=1 << 20):
+    with BenchmarkWriter(filename, append=append, batch_bytes=batch_bytes) as writer:
+        for seed, instance in instances:
+            writer.write_instance(*instance, seed=seed, measures={"welfare": seed})
+
+
+@pytest.mark.parametrize("batch_bytes", [1, 64, 1 << 20])
+def test_offsets_point_at_each_instance(tmp_path, batch_bytes):
+    filename = str(tmp_path / "bench.csv")
+    instances = [(seed, make_instance(2 + seed, 5 - seed % 3, seed)) for seed in range(5)]
+    write_all(filename, instances[:3], batch_bytes=batch_bytes)
+    write_all(filename, instances[3:], append=True, batch_bytes=batch_bytes)
+
+    index = read_benchmark_index(filename)
+    assert [entry["id"] for entry in index] == list(range(5))
+    assert [entry["seed"] for entry in index] == [seed for seed, _ in instances]
+    assert [(entry["n_students"], entry["n_schools"]) for entry in index] == \
+        [(len(students), len(schools)) for _, (students, schools, _, _) in instances]
+
+    scanned = list(iter_instances_with_offsets(filename))
+    assert [entry["offset"] for entry in index] == [offset for offset, _ in scanned]
+    for entry, (offset, instance), (_, (_, _, prefs_students, prefs_schools)) in zip(index, scanned, instances):
+        assert read_benchmark_instance(filename, entry["offset"]) == instance == (prefs_students, prefs_schools)
+
+    # sans l'index annexe : mêmes offsets, retrouvés en parcourant le fichier
+    os.remove(index_filename(filename))
+    assert [entry["offset"] for entry in read_benchmark_index(filename)] == [offset for offset, _ in scanned]
+
+
+def test_index_writes_nan_measures_as_null(tmp_path):
+    filename = str(tmp_path / "bench.csv")
+    with BenchmarkWriter(filename) as writer:
+        writer.write_instance(["s1"], ["e1"], {"s1": ["e1"]}, {"e1": ["s1"]}, seed=3,
+                              measures={"avg_rank_students": float("nan"), "welfare": 2,
+                                        "percentiles_students": [float("nan"), 1.0]})
+
+    with open(index_filename(filename), encoding="utf-8") as f:
+        text = f.read()
+    assert "NaN" not in text
+    entry = json.loads(text)
+    assert entry["measures"] == {"avg_rank_students": None, "welfare": 2, "percentiles_students": [None, 1.0]}
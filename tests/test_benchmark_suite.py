@@ -0,0 +1,30 @@
+import argparse
+import json
+
+import pytest
+
+from benchmark_suite import main, parse_model_params
+
+
+def test_parse_model_params_types():
+    params = parse_model_params(["euclidean.dim=3", "mallows.phi=0.3", "master.correlation=1e-1"])
+    assert params == {"euclidean": {"dim": 3}, "mallows": {"phi": 0.3}, "master": {"correlation": 0.1}}
+    assert isinstance(params["euclidean"]["dim"], int)
+
+
+@pytest.mark.parametrize("item", ["euclidean.dim", "dim=3", "euclidean.dim=trois"])
+def test_parse_model_params_invalid(item):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_model_params([item])
+
+
+def test_cli_euclidean_dim(tmp_path):
+    output = tmp_path / "bench.json"
+    status = main(["--models", "euclidean", "--param", "euclidean.dim=3",
+                   "--sizes", "10", "20", "--repeat", "1", "--output", str(output)])
+    assert status == 0
+
+    with open(output, encoding="utf-8") as f:
+        results = json.load(f)["results"]
+    assert {r["model"] for r in results} == {"euclidean"}
+    assert {r["n"] for r in results} == {10, 20}
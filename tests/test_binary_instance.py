@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from binary_instance import HEADER, load_indexed_instance, read_binary_instance, to_prefs_dicts
+from gale_shapley import gale_shapley, index_instance
+from generate_preference import generate_preferences_ids, save_to_binary
+
+
+def name_dicts(n_students, n_schools, seed=0):
+    students, schools, prefs_students, prefs_schools = generate_preferences_ids(n_students, n_schools, seed=seed)
+    students, schools = list(students), list(schools)
+    return (students, schools) + to_prefs_dicts(students, schools, prefs_students, prefs_schools)
+
+
+@pytest.mark.parametrize("n_students, n_schools, itemsize", [
+    (7, 7, 2),
+    (9, 4, 2),        # non carrée
+    (3, 40000, 4),    # identifiants au-delà de 16 bits
+])
+def test_round_trip(tmp_path, n_students, n_schools, itemsize):
+    students, schools, prefs_students, prefs_schools = name_dicts(n_students, n_schools)
+    filename = str(tmp_path / "instance.gsinst")
+    save_to_binary(students, schools, prefs_students, prefs_schools, filename=filename)
+
+    read_students, read_schools, matrix_students, matrix_schools = read_binary_instance(filename)
+    assert read_students == students and read_schools == schools
+    assert matrix_students.dtype.itemsize == matrix_schools.dtype.itemsize == itemsize
+    assert matrix_students.shape == (n_students, n_schools) and matrix_schools.shape == (n_schools, n_students)
+    assert to_prefs_dicts(read_students, read_schools, matrix_students, matrix_schools) == \
+        (prefs_students, prefs_schools)
+
+    loaded = load_indexed_instance(filename)
+    expected = index_instance(prefs_students, prefs_schools)
+    for table in ("prefs_students", "prefs_schools", "rank_students", "rank_schools"):
+        assert list(getattr(loaded, table)) == list(getattr(expected, table)), table
+    assert list(gale_shapley(loaded)) == list(gale_shapley(expected))
+
+
+def test_bad_magic(tmp_path):
+    filename = tmp_path / "instance.gsinst"
+    save_to_binary(*name_dicts(3, 3), filename=str(filename))
+    data = bytearray(filename.read_bytes())
+    data[:8] = b"NOTGSINS"
+    filename.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        read_binary_instance(str(filename))
+
+
+@pytest.mark.parametrize("cut", [HEADER.size - 1, HEADER.size + 2, -1])
+def test_truncated_file(tmp_path, cut):
+    filename = tmp_path / "instance.gsinst"
+    save_to_binary(*name_dicts(4, 5), filename=str(filename))
+    filename.write_bytes(filename.read_bytes()[:cut])
+
+    with pytest.raises(ValueError):
+        read_binary_instance(str(filename))
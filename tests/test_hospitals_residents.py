@@ -0,0 +1,73 @@
+import itertools
+import random
+
+import pytest
+
+from hospitals_residents import compute_all_measures_capacities, is_stable_capacities, mariage_stable_capacites
+
+
+# =====================================================================
+# Comparaison à une énumération exhaustive sur de petites instances
+# =====================================================================
+
+def random_instance(n_students, n_schools, seed):
+    rng = random.Random(seed)
+    students = [f"s{i}" for i in range(n_students)]
+    schools = [f"e{i}" for i in range(n_schools)]
+    prefs_students = {s: rng.sample(schools, n_schools) for s in students}
+    prefs_schools = {e: rng.sample(students, n_students) for e in schools}
+    capacities = {e: rng.randint(0, 2) for e in schools}
+    return prefs_students, prefs_schools, capacities
+
+
+def all_admissions(prefs_students, capacities):
+    """Toutes les affectations respectant les capacités (None = non affecté)."""
+    students = list(prefs_students)
+    for choice in itertools.product([None, *capacities], repeat=len(students)):
+        admissions = {e: [] for e in capacities}
+        for s, e in zip(students, choice):
+            if e is not None:
+                admissions[e].append(s)
+        if all(len(admissions[e]) <= capacities[e] for e in capacities):
+            yield admissions
+
+
+def has_blocking_pair(prefs_students, prefs_schools, capacities, admissions):
+    match_student = {s: e for e, admitted in admissions.items() for s in admitted}
+    for s, prefs_s in prefs_students.items():
+        current = match_student.get(s)
+        for e in prefs_s:
+            if e == current:
+                break
+            admitted = admissions[e]
+            if len(admitted) < capacities[e]:
+                return True
+            if any(prefs_schools[e].index(s) < prefs_schools[e].index(t) for t in admitted):
+                return True
+    return False
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_is_stable_capacities_matches_brute_force(seed):
+    prefs_students, prefs_schools, capacities = random_instance(4, 3, seed)
+    for admissions in all_admissions(prefs_students, capacities):
+        expected = not has_blocking_pair(prefs_students, prefs_schools, capacities, admissions)
+        assert is_stable_capacities(prefs_students, prefs_schools, capacities, admissions) == expected
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_gale_shapley_capacities_is_student_optimal(seed):
+    prefs_students, prefs_schools, capacities = random_instance(5, 3, seed)
+    admissions = mariage_stable_capacites(prefs_students, prefs_schools, capacities)
+    assert compute_all_measures_capacities(prefs_students, prefs_schools, capacities, admissions)["stable"]
+
+    def rank(prefs_s, e):
+        return prefs_s.index(e) if e is not None else len(prefs_s)
+
+    obtained = {s: e for e, admitted in admissions.items() for s in admitted}
+    for other in all_admissions(prefs_students, capacities):
+        if has_blocking_pair(prefs_students, prefs_schools, capacities, other):
+            continue
+        match_other = {s: e for e, admitted in other.items() for s in admitted}
+        for s, prefs_s in prefs_students.items():
+            assert rank(prefs_s, obtained.get(s)) <= rank(prefs_s, match_other.get(s))
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from incremental import IncrementalMatching
+from sparse_instance import mariage_stable_sparse
+
+
+# =====================================================================
+# Comparaison à une résolution complète après chaque modification
+# =====================================================================
+
+def random_prefs(rng, schools):
+    return rng.sample(schools, rng.randint(1, len(schools)))  # listes éventuellement incomplètes
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_incremental_matches_full_solve(seed):
+    rng = random.Random(seed)
+    schools = [f"e{i}" for i in range(5)]
+    prefs_students = {f"s{i}": random_prefs(rng, schools) for i in range(6)}
+    prefs_schools = {e: rng.sample(list(prefs_students), len(prefs_students)) for e in schools}
+
+    matching = IncrementalMatching(prefs_students, prefs_schools)
+    assert matching.engaged == mariage_stable_sparse(prefs_students, prefs_schools)
+
+    next_id = len(prefs_students)
+    for _ in range(12):
+        operation = rng.choice(["add", "withdraw", "update"])
+        if operation == "add" or len(prefs_students) < 2:
+            name = f"s{next_id}"
+            next_id += 1
+            prefs_students[name] = random_prefs(rng, schools)
+            positions = {e: rng.randint(0, len(prefs_students)) for e in rng.sample(schools, 2)}
+            for e in schools:
+                # position parmi les étudiants actifs, dernier par défaut
+                prefs_schools[e].insert(positions.get(e, len(prefs_schools[e])), name)
+            matching.add_student(name, prefs_students[name], positions)
+        elif operation == "withdraw":
+            name = rng.choice(list(prefs_students))
+            del prefs_students[name]
+            for e in schools:
+                prefs_schools[e].remove(name)
+            matching.withdraw_student(name)
+        else:
+            name = rng.choice(list(prefs_students))
+            prefs_students[name] = random_prefs(rng, schools)
+            matching.update_student(name, prefs_students[name])
+
+        assert matching.engaged == mariage_stable_sparse(prefs_students, prefs_schools), operation
+
+
+def test_add_position_ignores_withdrawn_students():
+    prefs_students = {"a": ["x"], "b": ["x"], "c": ["x"]}
+    prefs_schools = {"x": ["a", "b", "c"]}
+    matching = IncrementalMatching(prefs_students, prefs_schools)
+    matching.withdraw_student("a")
+
+    # position 1 parmi les actifs (b, c) : entre b et c
+    matching.add_student("d", ["x"], {"x": 1})
+    matching.withdraw_student("b")
+    assert matching.engaged == {"x": "d"}
+
+
+# =====================================================================
+# Coût d'une modification isolée sur une grande instance
+# =====================================================================
+
+def test_single_edit_cost_stays_linear():
+    rng = random.Random(0)
+    n = 800
+    schools = [f"e{i}" for i in range(n)]
+    prefs_students = {f"s{i}": rng.sample(schools, n) for i in range(n)}
+    prefs_schools = {e: rng.sample(list(prefs_students), n) for e in schools}
+    matching = IncrementalMatching(prefs_students, prefs_schools)
+
+    costs = []
+    for step in range(24):
+        name = rng.choice(sorted(prefs_students))
+        prefs = list(prefs_students[name])
+        operation = ["swap", "top", "update", "withdraw"][step % 4]
+        if operation == "withdraw":
+            del prefs_students[name]
+            for e in schools:
+                prefs_schools[e].remove(name)
+            matching.withdraw_student(name)
+        else:
+            if operation == "swap":
+                # deux écoles voisines déjà proposées
+                i = rng.randrange(max(1, matching.next_choice[matching.student_ids[name]] - 1))
+                prefs[i], prefs[i + 1] = prefs[i + 1], prefs[i]
+            elif operation == "top":
+                prefs.insert(0, prefs.pop(rng.randrange(n)))
+            else:
+                prefs = rng.sample(schools, n)
+            prefs_students[name] = prefs
+            matching.update_student(name, prefs)
+
+        cost = matching.last_cost["invalidated"] + matching.last_cost["proposals"]
+        assert cost <= 5 * n, operation
+        costs.append(cost)
+
+    # une résolution complète fait ici environ 6,5n propositions
+    assert sum(costs) / len(costs) <= 2 * n
+    assert matching.engaged == mariage_stable_sparse(prefs_students, prefs_schools)
@@ -0,0 +1,152 @@
+import random
+
+import numpy as np
+import pytest
+
+from binary_instance import to_prefs_dicts
+from gale_shapley import gale_shapley, index_instance, to_engaged
+from gale_shapley_numpy import gale_shapley_batch, rank_arrays_batch
+from generate_preference import generate_preferences_ids
+from mariage_stable_mesure import compute_all_measures
+from measures import (PERCENTILES, compute_distribution_measures, compute_measures, compute_rank_arrays,
+                      iter_blocking_pairs, json_measure, rank_summary)
+
+
+# =====================================================================
+# Références directes (définitions, sans histogramme)
+# =====================================================================
+
+def gini(values):
+    """Gini par la moyenne des écarts absolus entre toutes les paires."""
+    n = len(values)
+    if n == 0:
+        return float("nan")
+    total = sum(values)
+    if total == 0:
+        return 0.0
+    return sum(abs(a - b) for a in values for b in values) / (2 * n * total)
+
+
+def brute_blocking_pairs(instance, match_school):
+    n, m = instance.n_students, instance.n_schools
+    match_student = {s: e for e, s in enumerate(match_school) if s != -1}
+    pairs = set()
+    for s in range(n):
+        for e in range(m):
+            current_e = match_student.get(s)
+            current_s = match_school[e]
+            student_prefers = current_e is None or \
+                instance.rank_students[s * m + e] < instance.rank_students[s * m + current_e]
+            school_prefers = current_s == -1 or \
+                instance.rank_schools[e * n + s] < instance.rank_schools[e * n + current_s]
+            if student_prefers and school_prefers:
+                pairs.add((s, e))
+    return pairs
+
+
+def random_case(seed):
+    """
+    Dictionnaires de noms, instance encodée et matching (stable, ou dégradé
+    en libérant des écoles).
+    """
+    rng = random.Random(seed)
+    n_students, n_schools = rng.randint(1, 9), rng.randint(2, 9)
+    students, schools, prefs_students, prefs_schools = generate_preferences_ids(n_students, n_schools, seed=seed)
+    prefs = to_prefs_dicts(list(students), list(schools), prefs_students, prefs_schools)
+    instance = index_instance(*prefs)
+    match_school = list(gale_shapley(instance, rng.choice(["students", "schools"])))
+    for e in range(n_schools):
+        if rng.random() < 0.3:
+            match_school[e] = -1
+    return prefs, instance, match_school
+
+
+CASES = range(40)
+
+
+# =====================================================================
+# Mesures de rang
+# =====================================================================
+
+@pytest.mark.parametrize("seed", CASES)
+def test_distribution_measures(seed):
+    _, instance, match_school = random_case(seed)
+    ranks_students, ranks_schools = compute_rank_arrays(instance, match_school)
+    summary = compute_distribution_measures(instance, match_school)
+
+    sums = {}
+    for side, ranks, n_ranks in (("students", ranks_students, instance.n_schools),
+                                 ("schools", ranks_schools, instance.n_students)):
+        values = [int(r) for r in ranks if r != -1]
+        sums[side] = sum(values)
+        if values:
+            assert summary[f"percentiles_{side}"] == pytest.approx(np.percentile(values, PERCENTILES))
+            assert summary[f"avg_rank_{side}"] == pytest.approx(sum(values) / len(values))
+        else:
+            assert np.isnan(summary[f"percentiles_{side}"]).all()
+            assert np.isnan(summary[f"avg_rank_{side}"])
+        assert summary[f"gini_{side}"] == pytest.approx(gini(values), nan_ok=True)
+        assert summary[f"worst_rank_{side}"] == max(values, default=-1)
+        assert summary[f"unmatched_{side}"] == len(ranks) - len(values)
+        assert list(summary[f"hist_{side}"]) == [values.count(r) for r in range(n_ranks)]
+
+    assert summary["egalitarian_cost"] == sums["students"] + sums["schools"]
+    assert summary["sex_equality_cost"] == abs(sums["students"] - sums["schools"])
+    assert summary["regret_cost"] == max(summary["worst_rank_students"], summary["worst_rank_schools"])
+
+
+@pytest.mark.parametrize("seed", CASES)
+def test_compute_measures_matches_legacy(seed):
+    (prefs_students, prefs_schools), instance, match_school = random_case(seed)
+    fast = compute_measures(instance, match_school)
+    legacy = compute_all_measures(prefs_students, prefs_schools, to_engaged(instance, match_school))
+    assert fast.keys() == legacy.keys()
+    for key, value in legacy.items():
+        assert fast[key] == pytest.approx(value, nan_ok=True), key
+
+
+@pytest.mark.parametrize("seed", CASES)
+def test_blocking_pairs(seed):
+    _, instance, match_school = random_case(seed)
+    assert set(iter_blocking_pairs(instance, match_school)) == brute_blocking_pairs(instance, match_school)
+
+
+def test_nobody_matched():
+    summary = rank_summary(np.full(3, -1, dtype=np.int32), np.full(4, -1, dtype=np.int32))
+    assert summary["unmatched_students"] == 3 and summary["unmatched_schools"] == 4
+    assert summary["egalitarian_cost"] == 0 and summary["welfare"] == 0
+    assert summary["worst_rank_students"] == -1 and summary["regret_cost"] == -1
+    assert np.isnan(summary["avg_rank_students"]) and np.isnan(summary["gini_schools"])
+    assert np.isnan(summary["percentiles_students"]).all()
+
+
+# =====================================================================
+# Mode batch : chaque ligne comme un matching seul
+# =====================================================================
+
+def test_batch_matches_single():
+    k, n = 12, 15
+    instances = [generate_preferences_ids(n, n, seed=i) for i in range(k)]
+    prefs_students = np.stack([inst[2] for inst in instances])
+    prefs_schools = np.stack([inst[3] for inst in instances])
+    ranks_students, ranks_schools = rank_arrays_batch(prefs_students, prefs_schools,
+                                                      gale_shapley_batch(prefs_students, prefs_schools))
+    ranks_students[::3, 0] = -1  # quelques agents libres
+
+    batch = rank_summary(ranks_students, ranks_schools)
+    for i in range(k):
+        single = rank_summary(ranks_students[i], ranks_schools[i])
+        for key, value in single.items():
+            np.testing.assert_allclose(np.asarray(batch[key][i], dtype=float), np.asarray(value, dtype=float),
+                                       err_msg=key)
+
+
+# =====================================================================
+# Sérialisation JSON stricte
+# =====================================================================
+
+def test_json_measure():
+    assert json_measure(float("nan")) is None
+    assert json_measure(np.float64("inf")) is None
+    assert json_measure([1.5, float("nan"), 2]) == [1.5, None, 2]
+    assert json_measure(3) == 3 and json_measure(True) is True
@@ -0,0 +1,64 @@
+from array import array
+
+import pytest
+
+from binary_instance import indexed_from_matrices
+from gale_shapley import gale_shapley, iter_proposals
+from generate_preference import generate_preferences_ids
+from simulation_history import SimulationHistory
+from tracing import ACCEPTED
+
+
+def random_instance(n_students, n_schools, seed):
+    return indexed_from_matrices(*generate_preferences_ids(n_students, n_schools, seed=seed))
+
+
+def record(instance, interval=64):
+    history = SimulationHistory(instance.students, instance.schools, interval=interval)
+    for event in iter_proposals(instance):
+        history.append(event)
+    return history
+
+
+def naive_state(history, k):
+    """Engagements après k étapes, en rejouant le journal depuis le début."""
+    state = array("i", [-1] * len(history.schools))
+    for j in range(k):
+        s, e, outcome, _ = history.event(j)
+        if outcome == ACCEPTED:
+            state[e] = s
+    return state
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_final_state_is_gale_shapley(seed):
+    n_students, n_schools = 3 + seed % 7, 2 + seed % 5
+    instance = random_instance(n_students, n_schools, seed)
+    history = record(instance, interval=4)
+    assert list(history.state_at(len(history))) == list(gale_shapley(instance))
+    assert history.current == history.state_at(len(history))
+
+
+def test_state_at_around_checkpoints():
+    instance = random_instance(60, 60, seed=1)
+    history = record(instance)
+    assert len(history) > 3 * history.interval
+
+    for k in (0, 1, 63, 64, 65, 127, 128, 129, 191, 192, 193, len(history) - 1, len(history)):
+        assert history.state_at(k) == naive_state(history, k), k
+    assert list(history.state_at(len(history))) == list(gale_shapley(instance))
+
+    # iter_steps part d'un point de reprise puis avance étape par étape
+    for k, _, state in history.iter_steps(60, 70):
+        assert state == naive_state(history, k + 1)
+
+    with pytest.raises(IndexError):
+        history.state_at(len(history) + 1)
+
+
+def test_engaged_at_uses_names():
+    instance = random_instance(4, 4, seed=2)
+    history = record(instance)
+    engaged = history.engaged_at(len(history))
+    match_school = gale_shapley(instance)
+    assert engaged == {instance.schools[e]: instance.students[s] for e, s in enumerate(match_school)}
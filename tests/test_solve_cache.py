@@ -0,0 +1,93 @@
+import os
+import pickle
+
+import solve_cache
+from binary_instance import load_indexed_instance, to_prefs_dicts
+from gale_shapley import gale_shapley, index_instance
+from generate_preference import generate_preferences_ids, save_to_binary, save_to_csv
+from mariage_stable_mesure import read_instance
+from solve_cache import CACHE_VERSION, SolveCache, instance_fingerprint, solve_cached
+
+
+def entry_size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def small_instance(seed=0):
+    students, schools, prefs_students, prefs_schools = generate_preferences_ids(6, 5, seed=seed)
+    students, schools = list(students), list(schools)
+    return (students, schools) + to_prefs_dicts(students, schools, prefs_students, prefs_schools)
+
+
+# =====================================================================
+# Niveau mémoire : LRU borné en octets
+# =====================================================================
+
+def test_lru_evicts_least_recently_used():
+    values = {key: bytes(100) for key in "abc"}
+    cache = SolveCache(max_bytes=2 * entry_size(values["a"]))
+    cache.put("a", values["a"])
+    cache.put("b", values["b"])
+    assert cache.get("a") == values["a"]  # "a" devient le plus récent
+
+    cache.put("c", values["c"])
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.size == 2 * entry_size(values["a"]) <= cache.max_bytes
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_value_larger_than_bound_is_not_kept_in_memory(tmp_path):
+    cache = SolveCache(max_bytes=50, directory=str(tmp_path))
+    cache.put("big", bytes(100))
+    assert len(cache) == 0 and cache.size == 0
+    assert cache.get("big") == bytes(100)  # relu depuis le disque
+
+
+# =====================================================================
+# Niveau disque
+# =====================================================================
+
+def test_disk_reload_after_clear(tmp_path):
+    cache = SolveCache(directory=str(tmp_path))
+    cache.put("key", {"welfare": 3})
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+    assert cache.get("key") == {"welfare": 3}
+    assert len(cache) == 1 and cache.hits == 1
+    # un autre cache sur le même répertoire retrouve l'entrée
+    assert SolveCache(directory=str(tmp_path)).get("key") == {"welfare": 3}
+
+
+def test_cache_version_is_part_of_the_key(tmp_path, monkeypatch):
+    instance = index_instance(*small_instance()[2:])
+    cache = SolveCache(directory=str(tmp_path))
+    match_school, _ = solve_cached(instance, "students", cache)
+    assert list(match_school) == list(gale_shapley(instance, "students"))
+    assert os.listdir(tmp_path) == [f"{instance_fingerprint(instance)}-students-v{CACHE_VERSION}.pkl"]
+
+    solve_cached(instance, "students", cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # nouvelle version : l'entrée existante n'est plus servie
+    monkeypatch.setattr(solve_cache, "CACHE_VERSION", CACHE_VERSION + 1)
+    solve_cached(instance, "students", cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+# =====================================================================
+# Empreinte indépendante du format de lecture
+# =====================================================================
+
+def test_fingerprint_same_for_csv_and_binary(tmp_path):
+    students, schools, prefs_students, prefs_schools = small_instance(seed=3)
+    csv_file, binary_file = str(tmp_path / "instance.csv"), str(tmp_path / "instance.gsinst")
+    save_to_csv(students, schools, prefs_students, prefs_schools, filename=csv_file)
+    save_to_binary(students, schools, prefs_students, prefs_schools, filename=binary_file)
+
+    from_csv = index_instance(*read_instance(csv_file))
+    from_binary = load_indexed_instance(binary_file)
+    assert instance_fingerprint(from_csv) == instance_fingerprint(from_binary)
+    assert instance_fingerprint(from_csv) != instance_fingerprint(index_instance(*small_instance(seed=4)[2:]))
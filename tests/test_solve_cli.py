@@ -0,0 +1,52 @@
+import json
+
+from solve_cli import main
+
+
+def test_measures_without_matches_are_null(tmp_path):
+    # chaque étudiant classe une école qui ne le classe pas : personne n'est apparié
+    instance = tmp_path / "instance.csv"
+    instance.write_text("Type,Nom,Préférences\n"
+                        "Etudiant,s1,e1\nEtudiant,s2,e2\n"
+                        "Ecole,e1,s2\nEcole,e2,s1\n", encoding="utf-8")
+    measures = tmp_path / "measures.jsonl"
+
+    status = main([str(instance), "--engine", "sparse", "--measures", "all",
+                   "-o", str(tmp_path / "matching.csv"), "--measures-output", str(measures)])
+    assert status == 0
+
+    text = measures.read_text(encoding="utf-8")
+    assert "NaN" not in text
+    record = json.loads(text)
+    assert record["avg_rank_students"] is None and record["avg_rank_schools"] is None
+    assert record["unmatched_students"] == 2
+
+
+def test_unknown_agent_is_reported(tmp_path, capsys):
+    instance = tmp_path / "instance.csv"
+    instance.write_text("Type,Nom,Préférences\n"
+                        "Etudiant,s1,e9\n"
+                        "Ecole,e1,s1\n", encoding="utf-8")
+
+    status = main([str(instance), "-o", str(tmp_path / "matching.csv"), "--measures", "none"])
+    assert status == 1
+    assert "école inconnue : e9" in capsys.readouterr().err
+
+
+def test_workers_with_both_sides(tmp_path):
+    inputs = []
+    for i in range(3):
+        instance = tmp_path / f"instance{i}.csv"
+        instance.write_text("Type,Nom,Préférences\n"
+                            "Etudiant,s1,e1 - e2\nEtudiant,s2,e1 - e2\n"
+                            "Ecole,e1,s2 - s1\nEcole,e2,s1 - s2\n", encoding="utf-8")
+        inputs.append(str(instance))
+    output = tmp_path / "matching.jsonl"
+
+    status = main(inputs + ["--side", "both", "--workers", "2", "-o", str(output), "--measures", "none"])
+    assert status == 0
+
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [row["instance"] for row in rows] == [path for path in inputs for _ in range(4)]
+    assert {(row["side"], row["school"], row["student"]) for row in rows} == {
+        ("students", "e1", "s2"), ("students", "e2", "s1"), ("schools", "e1", "s2"), ("schools", "e2", "s1")}
@@ -0,0 +1,91 @@
+import itertools
+import random
+
+import pytest
+
+from sparse_instance import blocking_pairs_sparse, compute_measures_sparse, gale_shapley_sparse, index_sparse_instance
+
+
+# =====================================================================
+# Comparaison à une énumération exhaustive sur de petites instances
+# =====================================================================
+
+def random_instance(n_students, n_schools, seed):
+    """Listes incomplètes des deux côtés."""
+    rng = random.Random(seed)
+    students = [f"s{i}" for i in range(n_students)]
+    schools = [f"e{i}" for i in range(n_schools)]
+    prefs_students = {s: rng.sample(schools, rng.randint(0, n_schools)) for s in students}
+    prefs_schools = {e: rng.sample(students, rng.randint(0, n_students)) for e in schools}
+    return index_sparse_instance(prefs_students, prefs_schools)
+
+
+def rank_of(instance, s, e):
+    """(rang de e pour s, rang de s pour e), None si la paire n'est pas acceptable."""
+    choices = list(instance.student_list(s))
+    if e not in choices or s not in instance.school_ranks[e]:
+        return None
+    return choices.index(e), instance.school_ranks[e][s]
+
+
+def all_matchings(instance):
+    """Tous les matchings (match_school) formés de paires acceptables."""
+    options = [[-1] + [e for e in instance.student_list(s) if rank_of(instance, s, e)]
+               for s in range(instance.n_students)]
+    for choice in itertools.product(*options):
+        taken = [e for e in choice if e != -1]
+        if len(taken) == len(set(taken)):
+            match_school = [-1] * instance.n_schools
+            for s, e in enumerate(choice):
+                if e != -1:
+                    match_school[e] = s
+            yield match_school
+
+
+def brute_blocking_pairs(instance, match_school):
+    match_student = {s: e for e, s in enumerate(match_school) if s != -1}
+    pairs = []
+    for s in range(instance.n_students):
+        for e in range(instance.n_schools):
+            ranks = rank_of(instance, s, e)
+            if ranks is None or match_student.get(s) == e:
+                continue
+            current_e = match_student.get(s)
+            student_prefers = current_e is None or ranks[0] < rank_of(instance, s, current_e)[0]
+            current_s = match_school[e]
+            school_prefers = current_s == -1 or ranks[1] < instance.school_ranks[e][current_s]
+            if student_prefers and school_prefers:
+                pairs.append((s, e))
+    return pairs
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_blocking_pairs_sparse_matches_brute_force(seed):
+    instance = random_instance(4, 4, seed)
+    for match_school in all_matchings(instance):
+        assert sorted(blocking_pairs_sparse(instance, match_school)) == brute_blocking_pairs(instance, match_school)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_gale_shapley_sparse_is_student_optimal(seed):
+    instance = random_instance(5, 4, seed)
+    match_school = gale_shapley_sparse(instance)
+    assert not brute_blocking_pairs(instance, match_school)
+
+    def student_ranks(match):
+        ranks = [len(instance.student_list(s)) for s in range(instance.n_students)]  # libre = pire
+        for e, s in enumerate(match):
+            if s != -1:
+                ranks[s] = rank_of(instance, s, e)[0]
+        return ranks
+
+    obtained = student_ranks(match_school)
+    for other in all_matchings(instance):
+        if not brute_blocking_pairs(instance, other):
+            assert all(a <= b for a, b in zip(obtained, student_ranks(other)))
+
+    measures = compute_measures_sparse(instance, match_school)
+    matched = sum(s != -1 for s in match_school)
+    assert measures["unmatched_students"] == instance.n_students - matched
+    assert measures["unmatched_schools"] == instance.n_schools - matched
+    assert measures["pareto_optimal"]
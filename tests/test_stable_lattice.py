@@ -0,0 +1,115 @@
+import itertools
+import random
+
+import pytest
+
+from gale_shapley import index_instance
+from stable_lattice import build_rotation_poset, egalitarian_cost_of, egalitarian_optimal, iter_stable_matchings
+
+
+# =====================================================================
+# Comparaison à une énumération exhaustive sur de petites instances
+# =====================================================================
+
+def random_instance(n_students, n_schools, seed):
+    rng = random.Random(seed)
+    students = [f"s{i}" for i in range(n_students)]
+    schools = [f"e{i}" for i in range(n_schools)]
+    return index_instance(
+        {s: rng.sample(schools, n_schools) for s in students},
+        {e: rng.sample(students, n_students) for e in schools},
+    )
+
+
+def latin_instance(n):
+    """Préférences cycliques : beaucoup de matchings stables pour une petite taille."""
+    students = [f"s{i}" for i in range(n)]
+    schools = [f"e{i}" for i in range(n)]
+    return index_instance(
+        {students[i]: [schools[(i + k) % n] for k in range(n)] for i in range(n)},
+        {schools[j]: [students[(j + 1 + k) % n] for k in range(n)] for j in range(n)},
+    )
+
+
+def block_instance(n_blocks):
+    """
+    Blocs 2 x 2 indépendants ayant chacun deux matchings stables : 2**n_blocks
+    matchings stables, treillis produit (pas une chaîne).
+    """
+    n = 2 * n_blocks
+    students = [f"s{i}" for i in range(n)]
+    schools = [f"e{i}" for i in range(n)]
+    prefs_students, prefs_schools = {}, {}
+    for b in range(0, n, 2):
+        rest_s = [e for e in schools if e not in (schools[b], schools[b + 1])]
+        rest_e = [s for s in students if s not in (students[b], students[b + 1])]
+        prefs_students[students[b]] = [schools[b], schools[b + 1]] + rest_s
+        prefs_students[students[b + 1]] = [schools[b + 1], schools[b]] + rest_s
+        prefs_schools[schools[b]] = [students[b + 1], students[b]] + rest_e
+        prefs_schools[schools[b + 1]] = [students[b], students[b + 1]] + rest_e
+    return index_instance(prefs_students, prefs_schools)
+
+
+def is_stable(instance, match_school):
+    n, m = instance.n_students, instance.n_schools
+    match_student = [-1] * n
+    for f, s in enumerate(match_school):
+        if s != -1:
+            match_student[s] = f
+    for s in range(n):
+        for f in range(m):
+            current_f, current_s = match_student[s], match_school[f]
+            student_prefers = current_f == -1 or \
+                instance.rank_students[s * m + f] < instance.rank_students[s * m + current_f]
+            school_prefers = current_s == -1 or \
+                instance.rank_schools[f * n + s] < instance.rank_schools[f * n + current_s]
+            if current_f != f and student_prefers and school_prefers:
+                return False
+    return True
+
+
+def brute_stable_matchings(instance):
+    """Tous les matchings stables (tuples match_school), par énumération des injections."""
+    n, m = instance.n_students, instance.n_schools
+    found = set()
+    size = min(n, m)
+    for schools in itertools.permutations(range(m), size):
+        for students in itertools.combinations(range(n), size) if n > m else [range(n)]:
+            match_school = [-1] * m
+            for s, f in zip(students, schools):
+                match_school[f] = s
+            if is_stable(instance, match_school):
+                found.add(tuple(match_school))
+    return found
+
+
+# tailles choisies pour avoir plusieurs matchings stables, y compris n != m
+SIZES = [(4, 4), (5, 5), (6, 6), (7, 7), (5, 4), (4, 5)]
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("n_students, n_schools", SIZES)
+def test_enumeration_matches_brute_force(n_students, n_schools, seed):
+    instance = random_instance(n_students, n_schools, seed)
+    enumerated = [tuple(m) for m in iter_stable_matchings(build_rotation_poset(instance))]
+    assert len(enumerated) == len(set(enumerated))  # chaque matching une seule fois
+    assert set(enumerated) == brute_stable_matchings(instance)
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("n_students, n_schools", SIZES)
+def test_egalitarian_optimal_matches_brute_force(n_students, n_schools, seed):
+    instance = random_instance(n_students, n_schools, seed)
+    match_school, cost = egalitarian_optimal(build_rotation_poset(instance))
+    assert is_stable(instance, match_school)
+    assert cost == egalitarian_cost_of(instance, match_school)
+    assert cost == min(egalitarian_cost_of(instance, m) for m in brute_stable_matchings(instance))
+
+
+@pytest.mark.parametrize("instance", [latin_instance(4), latin_instance(7), block_instance(2), block_instance(3)])
+def test_structured_lattices(instance):
+    poset = build_rotation_poset(instance)
+    expected = brute_stable_matchings(instance)
+    assert len(expected) > 2
+    assert {tuple(m) for m in iter_stable_matchings(poset)} == expected
+    assert egalitarian_optimal(poset)[1] == min(egalitarian_cost_of(instance, m) for m in expected)
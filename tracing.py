@@ -0,0 +1,112 @@
+from collections import deque
+
+
+# =====================================================================
+# Traçage des propositions (remplace les print() du solveur)
+# =====================================================================
+#
+# Niveaux :
+#   "off"      : rien n'est enregistré (équivaut à tracer=None)
+#   "counters" : compteurs seulement (propositions, refus, évictions, chaîne)
+#   "events"   : compteurs + journal des propositions vers un puits (sink)
+#
+# Un événement est un tuple (étudiant, école, issue, évincé) avec issue dans
+# ACCEPTED / REJECTED et évincé = -1 si l'école était libre ou a refusé
+# (même convention que iter_proposals() de gale_shapley.py).
+# Aucune chaîne de caractères n'est construite tant qu'un FileSink n'écrit pas.
+
+LEVELS = ("off", "counters", "events")
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+
+
+class RingBufferSink:
+    """Garde en mémoire les `maxlen` derniers événements (deque bornée)."""
+
+    def __init__(self, maxlen=10_000):
+        self.events = deque(maxlen=maxlen)
+
+    def write(self, event):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Écrit un événement par ligne, champs séparés par des tabulations."""
+
+    def __init__(self, filename):
+        self.file = open(filename, "w", encoding="utf-8")
+
+    def write(self, event):
+        self.file.write("\t".join(str(x) for x in event) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class Tracer:
+    """
+    Collecte les compteurs d'une ou plusieurs exécutions de l'algorithme :
+
+      - proposals     : propositions faites
+      - rejections    : propositions refusées
+      - displacements : étudiants évincés par un candidat mieux classé
+      - longest_chain : plus longue suite d'évictions consécutives (dans l'ordre
+                        des propositions) entre deux acceptations par une
+                        école libre
+
+    Avec deferred_acceptance() (gale_shapley.py), l'évincé repropose aussitôt :
+    longest_chain est la longueur de la plus longue chaîne de rejets. Avec
+    mariage_stable() (file FIFO), l'évincé repasse en fin de file : des
+    évictions consécutives appartiennent à des chaînes différentes, et la
+    valeur ne mesure plus une chaîne mais seulement des évictions en rafale.
+
+    Le solveur appelle proposal() à chaque proposition ; avec sink=None au
+    niveau "events", les événements vont dans un RingBufferSink.
+    """
+
+    def __init__(self, level="counters", sink=None):
+        if level not in LEVELS:
+            raise ValueError(f"Niveau de traçage inconnu : {level!r} (attendu : {', '.join(LEVELS)})")
+        self.level = level
+        self.sink = None
+        if level == "events":
+            self.sink = sink if sink is not None else RingBufferSink()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return self.level != "off"
+
+    def reset(self):
+        self.counters = {"proposals": 0, "rejections": 0, "displacements": 0, "longest_chain": 0}
+        self._chain = 0
+
+    def proposal(self, student, school, accepted, displaced=-1):
+        counters = self.counters
+        counters["proposals"] += 1
+
+        if not accepted:
+            counters["rejections"] += 1
+        elif displaced != -1:
+            counters["displacements"] += 1
+            self._chain += 1
+            if self._chain > counters["longest_chain"]:
+                counters["longest_chain"] = self._chain
+        else:
+            self._chain = 0  # une école libre accepte : la chaîne s'arrête
+
+        if self.sink is not None:
+            self.sink.write((student, school, ACCEPTED if accepted else REJECTED, displaced))
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+
+def active_tracer(tracer):
+    """Retourne le tracer s'il enregistre quelque chose, None sinon (chemin rapide)."""
+    return tracer if tracer is not None and tracer.enabled else None
@@ -1,18 +1,19 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import time
 import io
 import zipfile
 import base64
-import os
 
 from generate_preference import generate_preferences, save_to_csv
-from mariage_stable_mesure import (
-    read_instance, compute_all_measures, compute_ranks, mariage_stable
-)
-
-from test_mesures_graph import test_measures_with_graphs
+from test_mesures_graph import figure_png, plot_benchmark_results, plot_stored_run, save_benchmark_results
+from benchmark_async import BenchmarkJob
+from benchmark_io import read_benchmark_index, read_benchmark_instance
+from gale_shapley import index_instance, iter_proposals, to_engaged
+from results_store import RESULTS_DIR, aggregate, list_runs, load_results, write_run
+from simulation_history import SimulationHistory
+from solve_cache import get_cache, solve_cached
+from tracing import REJECTED
 
 # ============================================================
 # CONFIGURATION DE LA PAGE
@@ -42,8 +43,8 @@ st.markdown(
 # ============================================================
 if 'bench_viewer_active' not in st.session_state:
     st.session_state['bench_viewer_active'] = False
-if 'bench_data' not in st.session_state:
-    st.session_state['bench_data'] = []
+if 'bench_index' not in st.session_state:
+    st.session_state['bench_index'] = []  # offsets (octets) des instances du fichier benchmark
 if 'current_bench_index' not in st.session_state:
     st.session_state['current_bench_index'] = 0
 
@@ -54,85 +55,169 @@ if "results" not in st.session_state:
     st.session_state["results"] = None
 if "figures" not in st.session_state:
     st.session_state["figures"] = None
+if "bench_job" not in st.session_state:
+    st.session_state["bench_job"] = None  # BenchmarkJob en cours d'exécution
+if "bench_run" not in st.session_state:
+    st.session_state["bench_run"] = None  # run_id du dernier benchmark dans le magasin de résultats
+if "stored_run" not in st.session_state:
+    st.session_state["stored_run"] = None  # (run_id, figures) d'une exécution passée affichée
 if "prefs_students" not in st.session_state:
     st.session_state["prefs_students"] = None
 if "prefs_schools" not in st.session_state:
     st.session_state["prefs_schools"] = None
 if "simulation_history" not in st.session_state:
-    st.session_state["simulation_history"] = []  # Pour stocker les logs de l'animation
+    st.session_state["simulation_history"] = None  # SimulationHistory : journal compact de l'animation
 
 # ============================================================
 # FONCTIONS UTILITAIRES
 # ============================================================
 
-def parse_benchmark_csv(filename):
-    """Lit le CSV et retourne une liste d'instances."""
+BENCH_FILE = "instances_bench_temp.csv"
+CACHE_DIR = ".solve_cache"  # cache disque des résolutions (partagé avec le benchmark)
+
+BENCH_COLUMNS = {
+    "avg_rank_students": "Rang moyen étudiants",
+    "avg_rank_schools": "Rang moyen écoles",
+    "welfare": "Welfare",
+    "egalitarian_cost": "Coût égalitaire",
+}
+
+@st.fragment(run_every=1.0)
+def render_benchmark_progress():
+    """
+    Suit le benchmark lancé en arrière-plan : progression, mesures des
+    instances déjà terminées, bouton d'annulation. À la fin (ou après
+    annulation), écrit le CSV et le magasin de résultats, trace les
+    graphiques à partir du magasin et relance la page. Sans pyarrow, le
+    magasin est ignoré et les graphiques viennent directement des résultats.
+    """
+    job = st.session_state["bench_job"]
+    if job is None:
+        return
+
+    finished = job.finished_results()
+    st.subheader("📊 Analyse sur plusieurs instances (tests aléatoires)")
+    st.progress(job.completed / job.total, text=f"Benchmark : {job.completed} / {job.total} instances")
+    if finished:
+        st.dataframe(pd.DataFrame([
+            {"Instance": i + 1, **{label: r.measures[key] for key, label in BENCH_COLUMNS.items()}}
+            for i, r in finished
+        ]), use_container_width=True)
+
+    if not job.done:
+        if st.button("⏹️ Annuler le benchmark", disabled=job.cancelled):
+            job.cancel()
+        return
+
+    if job.error is not None:
+        st.error(f"Le benchmark a échoué : {job.error}")
+    results = [r for _, r in finished]
+    if results:
+        # le fichier (et son index) est remplacé en une fois par le seul collecteur
+        save_benchmark_results(results, filename=BENCH_FILE)
+        try:
+            run_id = write_run(results, directory=RESULTS_DIR)
+        except ImportError:
+            st.session_state["figures"] = plot_benchmark_results(results)
+        else:
+            st.session_state["bench_run"] = run_id
+            st.session_state["figures"] = plot_stored_run(run_id, RESULTS_DIR)
+    st.session_state["bench_job"] = None
+    st.rerun()
+
+def load_benchmark_index(filename):
+    """Offsets des instances du fichier benchmark, lus dans son index annexe."""
     try:
-        df = pd.read_csv(filename)
+        return [entry["offset"] for entry in read_benchmark_index(filename)]
     except FileNotFoundError:
         st.error(f"Le fichier {filename} est introuvable.")
         return []
 
-    instances = []
-    current_students = {}
-    current_schools = {}
-    processing_schools = False
-
-    for _, row in df.iterrows():
-        row_type = row['Type'].strip()
-        name = row['Nom'].strip()
-        prefs = [p.strip() for p in str(row['Préférences']).split('-')]
-
-        if row_type == 'Etudiant':
-            if processing_schools:
-                instances.append((current_students, current_schools))
-                current_students = {}
-                current_schools = {}
-                processing_schools = False
-            current_students[name] = prefs
-        
-        elif row_type == 'Ecole':
-            processing_schools = True
-            current_schools[name] = prefs
-
-    if current_students and current_schools:
-        instances.append((current_students, current_schools))
-        
-    return instances
+def show_stored_run(run_id, figures):
+    """Exécution passée du benchmark, relue dans le magasin de résultats (rien n'est recalculé)."""
+    st.subheader(f"🗂️ Benchmark enregistré {run_id}")
+    if st.button("❌ Fermer l'historique"):
+        st.session_state["stored_run"] = None
+        st.rerun()
+
+    summary = aggregate(RESULTS_DIR, by=("side",), run_id=run_id)
+    st.dataframe(summary, use_container_width=True)
+    for fig in figures:
+        st.image(figure_png(fig))
+
+    st.download_button(
+        "📥 Télécharger les mesures par instance (CSV)",
+        load_results(RESULTS_DIR, run_id=run_id).to_csv(index=False).encode("utf-8"),
+        file_name=f"mesures_{run_id}.csv",
+        mime="text/csv",
+    )
+
+def render_step(history, k, event, state):
+    """Affiche l'étape k à partir de son événement et des engagements qui en résultent."""
+    s, e, outcome, displaced = event
+    student, school = history.students[s], history.schools[e]
+
+    st.markdown(f"### Étape {k + 1}")
+    st.markdown(f"👩‍🎓 **{student}** propose à 🏫 **{school}**")
+
+    if outcome == REJECTED:
+        st.error(f"❌ {school} rejette {student} (préférence pour {history.students[state[e]]})")
+    elif displaced != -1:
+        other = history.students[displaced]
+        st.warning(f"⚖️ {school} préfère {student} à {other} → {other} redevient libre")
+    else:
+        st.success(f"✅ {school} accepte temporairement {student}")
+
+    st.markdown("#### Engagements actuels :")
+    df = pd.DataFrame([
+        {"École": name, "Étudiant affecté": history.students[x] if x != -1 else "—"}
+        for name, x in zip(history.schools, state)
+    ])
+    st.dataframe(df, use_container_width=True)
+    st.markdown("---")
+
+HISTORY_PAGE_SIZE = 20  # étapes affichées à la fois dans le journal
 
 def render_history_log():
-    """Réaffiche l'historique de la simulation stocké en mémoire."""
-    if st.session_state["simulation_history"]:
-        st.subheader("Déroulement pas à pas (Historique)")
-        steps_container = st.container()
-        with steps_container:
-            for item_type, content in st.session_state["simulation_history"]:
-                if item_type == "header":
-                    st.markdown(content)
-                elif item_type == "success":
-                    st.success(content)
-                elif item_type == "warning":
-                    st.warning(content)
-                elif item_type == "error":
-                    st.error(content)
-                elif item_type == "markdown":
-                    st.markdown(content)
-                elif item_type == "dataframe":
-                    st.dataframe(content, use_container_width=True)
+    """
+    Réaffiche l'historique : un curseur choisit l'étape, l'état correspondant
+    est reconstruit depuis le point de reprise le plus proche et seule la page
+    du journal qui contient cette étape est rendue.
+    """
+    history = st.session_state["simulation_history"]
+    if not history:
+        return
+
+    st.subheader("Déroulement pas à pas (Historique)")
+    total = len(history)
+    step = st.slider("Étape", 1, total, total, key="history_step") if total > 1 else 1
+
+    engaged_step = history.engaged_at(step)
+    st.markdown(f"#### Engagements après l'étape {step} / {total}")
+    st.dataframe(pd.DataFrame([
+        {"École": e, "Étudiant affecté": s or "—"} for e, s in engaged_step.items()
+    ]), use_container_width=True)
+
+    start, stop = history.page(step - 1, HISTORY_PAGE_SIZE)
+    st.caption(f"Journal : étapes {start + 1} à {stop} sur {total}")
+    steps_container = st.container()
+    with steps_container:
+        for k, event, state in history.iter_steps(start, stop):
+            render_step(history, k, event, state)
 
 # ============================================================
 # BOITE DE DIALOGUE (MODALE) POUR LE BENCHMARK
 # ============================================================
 @st.dialog("Visualiseur d'Instances Benchmark", width="large")
 def show_benchmark_modal():
-    if not st.session_state['bench_data']:
+    if not st.session_state['bench_index']:
         st.warning("Aucune donnée à afficher.")
         if st.button("Fermer"):
             st.session_state['bench_viewer_active'] = False
             st.rerun()
         return
 
-    total = len(st.session_state['bench_data'])
+    total = len(st.session_state['bench_index'])
     idx = st.session_state['current_bench_index']
     
     col_nav1, col_nav2, col_nav3, col_close = st.columns([1, 2, 1, 1])
@@ -156,7 +241,8 @@ def show_benchmark_modal():
             st.rerun()
 
     st.markdown("---")
-    curr_students, curr_schools = st.session_state['bench_data'][idx]
+    # seule l'instance affichée est relue, directement à son offset
+    curr_students, curr_schools = read_benchmark_instance(BENCH_FILE, st.session_state['bench_index'][idx])
     
     col_v1, col_v2 = st.columns(2)
     with col_v1:
@@ -175,6 +261,20 @@ def show_benchmark_modal():
         ])
         st.dataframe(df_schools, use_container_width=True)
 
+    # résolution + mesures : instantané si l'instance a déjà été résolue
+    match_school, measures = solve_cached(index_instance(curr_students, curr_schools),
+                                          cache=get_cache(CACHE_DIR))
+    students = list(curr_students)
+    st.markdown("#### 💍 Matching stable (étudiants proposants)")
+    st.dataframe(pd.DataFrame([
+        {"École": e, "Étudiant affecté": students[s] if s != -1 else "—"}
+        for e, s in zip(curr_schools, match_school)
+    ]), use_container_width=True)
+    col_m1, col_m2, col_m3 = st.columns(3)
+    col_m1.metric("Rang moyen étudiants", f"{measures['avg_rank_students']:.2f}")
+    col_m2.metric("Welfare total", f"{measures['welfare']:.2f}")
+    col_m3.metric("Coût égalitaire", f"{measures['egalitarian_cost']}")
+
 
 # ============================================================
 # INTERFACE PRINCIPALE
@@ -198,94 +298,46 @@ st.sidebar.markdown("---")
 st.sidebar.header("Visualiseur Benchmark")
 
 if st.sidebar.button("📂 Charger instances benchmark"):
-    instances = parse_benchmark_csv("instances_bench_temp.csv")
-    if instances:
-        st.session_state['bench_data'] = instances
+    offsets = load_benchmark_index(BENCH_FILE)
+    if offsets:
+        st.session_state['bench_index'] = offsets
         st.session_state['bench_viewer_active'] = True
         st.session_state['current_bench_index'] = 0
     else:
         st.sidebar.warning("Aucune instance trouvée (lancez une simulation d'abord).")
 
+st.sidebar.markdown("---")
+st.sidebar.header("Historique des benchmarks")
+
+stored_runs = list_runs(RESULTS_DIR)
+if stored_runs:
+    selected_run = st.sidebar.selectbox("Exécution", stored_runs)
+    if st.sidebar.button("📈 Afficher les graphiques"):
+        st.session_state["stored_run"] = (selected_run, plot_stored_run(selected_run, RESULTS_DIR))
+else:
+    st.sidebar.caption("Aucun benchmark enregistré.")
+
 
 # ============================================================
 # VERSION ANIMÉE DE L'ALGORITHME
 # ============================================================
 
 def mariage_stable_animated(pref_student, pref_school, speed=0.5):
-    """Exécute l'algo, anime l'UI et enregistre l'historique."""
+    """
+    Anime l'UI à partir du flux de propositions du moteur (iter_proposals)
+    et enregistre l'historique compact (événements + points de reprise).
+    """
     steps_container = st.container()
-    free_students = list(pref_student.keys())
-    proposals = {p: [] for p in pref_student}
-    engaged = {s: None for s in pref_school}
-    
-    history = [] # Pour sauvegarder les étapes
-
-    step = 1
-    while free_students:
-        current_student = free_students[0]
-        next_school = None
-
-        for school in pref_student[current_student]:
-            if school not in proposals[current_student]:
-                next_school = school
-                break
-
-        if next_school is None:
-            free_students.pop(0)
-            continue
-
-        proposals[current_student].append(next_school)
-        current_eng = engaged[next_school]
-
-        # Affichage & Enregistrement
-        header_txt = f"### Étape {step}"
-        sub_txt = f"👩‍🎓 **{current_student}** propose à 🏫 **{next_school}**"
-        
-        with steps_container:
-            st.markdown(header_txt)
-            st.markdown(sub_txt)
-        
-        history.append(("header", header_txt))
-        history.append(("markdown", sub_txt))
-
-        if current_eng is None:
-            engaged[next_school] = current_student
-            free_students.pop(0)
-            msg = f"✅ {next_school} accepte temporairement {current_student}"
-            with steps_container:
-                st.success(msg)
-            history.append(("success", msg))
-        else:
-            rank_new = pref_school[next_school].index(current_student)
-            rank_old = pref_school[next_school].index(current_eng)
-            if rank_new < rank_old:
-                engaged[next_school] = current_student
-                free_students.pop(0)
-                free_students.append(current_eng)
-                msg = f"⚖️ {next_school} préfère {current_student} à {current_eng} → {current_eng} redevient libre"
-                with steps_container:
-                    st.warning(msg)
-                history.append(("warning", msg))
-            else:
-                msg = f"❌ {next_school} rejette {current_student} (préférence pour {current_eng})"
-                with steps_container:
-                    st.error(msg)
-                history.append(("error", msg))
+    instance = index_instance(pref_student, pref_school)
+    history = SimulationHistory(instance.students, instance.schools)
 
+    for event in iter_proposals(instance):
+        history.append(event)
         with steps_container:
-            st.markdown("#### Engagements actuels :")
-            df = pd.DataFrame([{"École": e, "Étudiant affecté": engaged[e] or "—"} for e in engaged])
-            st.dataframe(df, use_container_width=True)
-            st.markdown("---")
-        
-        history.append(("markdown", "#### Engagements actuels :"))
-        history.append(("dataframe", df))
-        history.append(("markdown", "---"))
-
-        step += 1
+            render_step(history, len(history) - 1, event, history.current)
         time.sleep(speed)
 
-    return engaged, history
+    return to_engaged(instance, history.current), history
 
 
 # ============================================================
@@ -294,6 +346,9 @@ def mariage_stable_animated(pref_student, pref_school, speed=0.5):
 if st.session_state['bench_viewer_active']:
     show_benchmark_modal()
 
+if st.session_state["stored_run"] is not None:
+    show_stored_run(*st.session_state["stored_run"])
+
 
 # ============================================================
 # EXÉCUTION DE LA SIMULATION (CALCUL)
@@ -309,6 +364,18 @@ if start_btn:
     st.session_state["prefs_students"] = prefs_students
     st.session_state["prefs_schools"] = prefs_schools
 
+    # Benchmark lancé en arrière-plan : il tourne pendant l'animation
+    if st.session_state["bench_job"] is not None:
+        st.session_state["bench_job"].cancel()
+    st.session_state["figures"] = None
+    st.session_state["bench_run"] = None
+    st.session_state["bench_job"] = BenchmarkJob(
+        nb_tests=nb_tests,
+        n_students=n_entites,
+        n_schools=n_entites,
+        cache_dir=CACHE_DIR
+    ).start()
+
     # 2. Animation (s'affiche en direct + enregistre l'historique)
     st.subheader("Déroulement pas à pas")
     col1, col2 = st.columns(2)
@@ -319,27 +386,13 @@ if start_btn:
     
     engaged, history = mariage_stable_animated(prefs_students, prefs_schools, speed)
     st.session_state["simulation_history"] = history  # Sauvegarde pour le rechargement
+    st.session_state.pop("history_step", None)  # le curseur repart de la dernière étape
     
     # 3. Calculs finaux
-    results = compute_all_measures(prefs_students, prefs_schools, engaged)
+    _, results = solve_cached(index_instance(prefs_students, prefs_schools), cache=get_cache(CACHE_DIR))
     st.session_state["engaged_final"] = engaged
     st.session_state["results"] = results
 
-    # 4. Benchmark
-    if os.path.exists("instances_bench_temp.csv"):
-        try:
-            os.remove("instances_bench_temp.csv")
-        except Exception:
-            pass
-
-    with st.spinner("Génération des graphiques (Benchmark)..."):
-        fig1, fig2, fig3 = test_measures_with_graphs(
-            nb_tests=nb_tests,
-            n_students=n_entites,
-            n_schools=n_entites
-        )
-        st.session_state["figures"] = (fig1, fig2, fig3)
-    
     st.success("✅ Simulation terminée !")
 
 
@@ -377,24 +430,30 @@ if st.session_state["engaged_final"] is not None and st.session_state["results"]
         pareto_text = "✅ Oui" if results["pareto_optimal"] else "❌ Non"
         st.metric("Pareto-optimalité", pareto_text)
 
+    if st.session_state["bench_job"] is not None:
+        st.markdown("---")
+        render_benchmark_progress()
+
     if st.session_state["figures"]:
         st.markdown("---")
         st.subheader("📊 Analyse sur plusieurs instances (tests aléatoires)")
-        
+        if st.session_state["bench_run"] is None:
+            st.info("pyarrow n'est pas installé : les mesures n'ont pas été enregistrées "
+                    "dans l'historique des benchmarks (pip install pyarrow).")
+
         fig1, fig2, fig3 = st.session_state["figures"]
-        st.pyplot(fig1)
-        st.pyplot(fig2)
-        st.pyplot(fig3)
+        # PNG déjà rendus lors de l'écriture des fichiers : ni re-rastérisés ni recompressés
+        st.image(figure_png(fig1))
+        st.image(figure_png(fig2))
+        st.image(figure_png(fig3))
 
         zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
+        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_STORED, False) as zip_file:
             for i, (fig, name) in enumerate(zip(
                 [fig1, fig2, fig3],
                 ["rang_moyen.png", "welfare.png", "cout_egalitaire.png"]
             )):
-                buf = io.BytesIO()
-                fig.savefig(buf, format="png", dpi=300, bbox_inches="tight")
-                zip_file.writestr(name, buf.getvalue())
+                zip_file.writestr(name, figure_png(fig))
         zip_buffer.seek(0)
 
         st.write("---")
@@ -424,6 +483,20 @@ if st.session_state["engaged_final"] is not None and st.session_state["results"]
             '📊 Télécharger les mesures globales (CSV)</a>'
         )
 
+        href_instances = ""
+        if st.session_state["bench_run"] is not None:
+            # mesures de chaque instance du benchmark, relues dans le magasin
+            csv_instances = load_results(RESULTS_DIR, run_id=st.session_state["bench_run"]).to_csv(
+                index=False).encode("utf-8")
+            b64_csv_instances = base64.b64encode(csv_instances).decode()
+            href_instances = (
+                f'<a href="data:text/csv;base64,{b64_csv_instances}" '
+                'download="mesures_par_instance.csv" '
+                'style="display:inline-block;background-color:#8a2be2;color:white;'
+                'padding:10px 18px;border-radius:8px;text-decoration:none;margin:6px;">'
+                '🗂️ Télécharger les mesures par instance (CSV)</a>'
+            )
+
         zip_data = zip_buffer.getvalue()
         b64_zip = base64.b64encode(zip_data).decode()
         href_zip = (
@@ -438,6 +511,7 @@ if st.session_state["engaged_final"] is not None and st.session_state["results"]
         <div style="text-align:center;">
             {href_result}
             {href_measures}
+            {href_instances}
             {href_zip}
         </div>
         """